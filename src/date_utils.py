@@ -25,6 +25,13 @@ MONTHS_ES = {
     "dic": "12", "diciembre": "12",
 }
 
+# Upper-case month names keyed by their first three letters, so "ENE" and "ENERO"
+# resolve with one lookup ("SET" is a common OCR variant of "SEP").
+MONTH_PREFIX_MX = {
+    "ENE": 1, "FEB": 2, "MAR": 3, "ABR": 4, "MAY": 5, "JUN": 6,
+    "JUL": 7, "AGO": 8, "SEP": 9, "SET": 9, "OCT": 10, "NOV": 11, "DIC": 12,
+}
+
 # Compiled regex patterns for performance
 DATE_ES_RE = re.compile(r"^\s*(\d{1,2})/([A-Za-z]{3,10})/(\d{2,4})\s*$")
 DATE_ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
@@ -113,22 +120,6 @@ def parse_mexican_date(date_str: str, year: Optional[int] = None) -> Optional[st
     if not year:
         year = datetime.now().year
 
-    # Months mapping (Standard Spanish abbreviations and common OCR variations)
-    months = {
-        "ENE": "01", "ENERO": "01",
-        "FEB": "02", "FEBRERO": "02",
-        "MAR": "03", "MARZO": "03",
-        "ABR": "04", "ABRIL": "04",
-        "MAY": "05", "MAYO": "05",
-        "JUN": "06", "JUNIO": "06",
-        "JUL": "07", "JULIO": "07",
-        "AGO": "08", "AGOSTO": "08",
-        "SEP": "09", "SET": "09", "SEPTIEMBRE": "09",
-        "OCT": "10", "OCTUBRE": "10",
-        "NOV": "11", "NOVIEMBRE": "11",
-        "DIC": "12", "DICIEMBRE": "12",
-    }
-
     # Try: Already ISO format "2024-01-12"
     m = re.match(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})", s)
     if m:
@@ -143,10 +134,10 @@ def parse_mexican_date(date_str: str, year: Optional[int] = None) -> Optional[st
         month_str = m.group(2)
         if not (1 <= day <= 31):
             return None
-        month = months.get(month_str)
+        month = MONTH_PREFIX_MX.get(month_str[:3])
         if not month:
             return None
-        return f"{year}-{month}-{day:02d}"
+        return f"{year}-{month:02d}-{day:02d}"
 
     # Try: "12/01/24" or "12-01-2024" (DD/MM/YY or DD/MM/YYYY)
     m = re.match(r"(\d{1,2})\s*[/-]\s*(\d{1,2})\s*[/-]\s*(\d{2,4})", s)
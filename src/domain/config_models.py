@@ -1,8 +1,16 @@
+import functools
 import re
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from re import Pattern
 
+
+@functools.lru_cache(maxsize=4096)
+def _compiled(pattern: str) -> Pattern:
+    # Rule sets are rebuilt on every config load and can outgrow re's own
+    # 512-entry cache; compile each pattern once per process instead.
+    return re.compile(pattern, re.IGNORECASE)
+
 @dataclass(frozen=True)
 class RuleAction:
     expense: str
@@ -16,7 +24,7 @@ class CategorizationRule:
     compiled_regexes: List[Pattern] = field(init=False, default_factory=list)
     
     def __post_init__(self):
-        object.__setattr__(self, 'compiled_regexes', [re.compile(rx, re.IGNORECASE) for rx in self.any_regex])
+        object.__setattr__(self, 'compiled_regexes', [_compiled(rx) for rx in self.any_regex])
 
 @dataclass(frozen=True)
 class MerchantAlias:
@@ -25,7 +33,7 @@ class MerchantAlias:
     compiled_regexes: List[Pattern] = field(init=False, default_factory=list)
     
     def __post_init__(self):
-        object.__setattr__(self, 'compiled_regexes', [re.compile(rx, re.IGNORECASE) for rx in self.any_regex])
+        object.__setattr__(self, 'compiled_regexes', [_compiled(rx) for rx in self.any_regex])
 
 @dataclass(frozen=True)
 class BankConfig:
@@ -16,6 +16,7 @@ Usage:
 """
 
 import argparse
+import functools
 import re
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Optional
@@ -24,6 +25,12 @@ from collections import defaultdict
 import yaml
 from logging_config import get_logger
 
+# Prefer the libyaml C bindings; PyYAML builds without them fall back to pure Python.
+try:
+    from yaml import CSafeDumper as _YamlDumper, CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper as _YamlDumper, SafeLoader as _YamlLoader
+
 logger = get_logger(__name__)
 
 # ----------------------------
@@ -31,12 +38,15 @@ logger = get_logger(__name__)
 # ----------------------------
 
 def load_yaml(path: Path) -> Dict[str, Any]:
-    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    return yaml.load(path.read_text(encoding="utf-8"), Loader=_YamlLoader) or {}
 
 
 def dump_yaml(path: Path, data: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(yaml.safe_dump(data, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    path.write_text(
+        yaml.dump(data, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True),
+        encoding="utf-8",
+    )
 
 
 def ensure_str_tag(tag: Any) -> Optional[str]:
@@ -82,6 +92,7 @@ def normalize_tags(tags: Any) -> List[str]:
     return res
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_regex(rx: str) -> str:
     r"""
     Makes regex more robust:
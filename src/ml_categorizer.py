@@ -16,6 +16,14 @@ MODEL_DIR = _load_settings().config_dir / "ml_models"
 MODEL_PATH = MODEL_DIR / "categorizer_v1.joblib"
 USE_NORMALIZED_TEXT = os.getenv("LSC_USE_NORMALIZED_TEXT", "true").strip().lower() not in {"0", "false", "no"}
 
+# pyarrow's multithreaded CSV reader is much faster than the default C parser on
+# large Firefly exports; it is optional, so fall back when it is not installed.
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:  # pragma: no cover
+    CSV_ENGINE = "c"
+
 class TransactionCategorizer:
     def __init__(self):
         self.pipeline = Pipeline([
@@ -34,23 +42,32 @@ class TransactionCategorizer:
         for p in csv_paths:
             if p.exists():
                 try:
-                    df = pd.read_csv(p)
-                    # We only train on withdrawals (cargos) because transfers (abonos) 
-                    # usually have very generic descriptions.
-                    if 'type' in df.columns:
-                        df = df[df['type'] == 'withdrawal']
-                    
-                    text_col = None
-                    if USE_NORMALIZED_TEXT and "normalized_description" in df.columns:
-                        text_col = "normalized_description"
-                    elif "description" in df.columns:
-                        text_col = "description"
-
-                    if text_col and 'destination_name' in df.columns:
-                        trimmed = df[[text_col, 'destination_name']].rename(columns={text_col: "description"})
-                        dfs.append(trimmed)
+                    dfs.append(pd.read_csv(p, engine=CSV_ENGINE))
                 except Exception as e:
                     logger.error(f"Error loading {p}: {e}")
+        return self.train_from_dataframes(dfs)
+
+    def train_from_dataframes(self, frames: List[pd.DataFrame]) -> bool:
+        """
+        Trains the model from Firefly-shaped DataFrames already held in memory.
+        Expects columns: 'description', 'destination_name'
+        """
+        dfs = []
+        for df in frames:
+            # We only train on withdrawals (cargos) because transfers (abonos) 
+            # usually have very generic descriptions.
+            if 'type' in df.columns:
+                df = df[df['type'] == 'withdrawal']
+
+            text_col = None
+            if USE_NORMALIZED_TEXT and "normalized_description" in df.columns:
+                text_col = "normalized_description"
+            elif "description" in df.columns:
+                text_col = "description"
+
+            if text_col and 'destination_name' in df.columns:
+                trimmed = df[[text_col, 'destination_name']].rename(columns={text_col: "description"})
+                dfs.append(trimmed)
         
         if not dfs:
             return False
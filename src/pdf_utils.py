@@ -4,39 +4,79 @@
 This module provides utilities for extracting transaction data and metadata from
 PDF bank statements using either text extraction or OCR fallback.
 """
+import functools
+import os
 import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import shutil
 from pathlib import Path
-from typing import Dict, Optional, Any, List
+from typing import Dict, Iterator, Optional, Any, List, Tuple
 
 from logging_config import get_logger
-from date_utils import parse_mexican_date as parse_mx_date_util
+from date_utils import MONTH_PREFIX_MX, parse_mexican_date as parse_mx_date_util
 
 logger = get_logger("pdf_utils")
 
 try:
     import fitz  # PyMuPDF
-    import cv2
-    import numpy as np
-    import pytesseract
-    # Windows fallback for Tesseract
-    if shutil.which("tesseract") is None:
-        common_paths = [
-            r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-            r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-        ]
-        for p in common_paths:
-            if Path(p).exists():
-                pytesseract.pytesseract.tesseract_cmd = p
-                logger.info(f"Tesseract found at: {p}")
-                break
 except ImportError as e:
     logger.warning(f"Optional PDF dependencies not available: {e}")
     fitz = None
-    cv2 = None
-    np = None
-    pytesseract = None
+
+# The OCR stack (OpenCV, NumPy, pytesseract) takes the better part of a second
+# to import and digital statements never need it, so it is loaded on first use
+# by _ensure_ocr_deps(). Until then the names hold this sentinel.
+_NOT_LOADED = object()
+cv2 = np = pytesseract = _NOT_LOADED
+_OCR_DEPS_LOCK = threading.Lock()
+
+
+def _ensure_ocr_deps() -> None:
+    """Import OpenCV, NumPy and pytesseract if that has not happened yet.
+
+    Missing packages leave the corresponding names set to None. Names that
+    already hold a value (including test doubles) are left alone.
+    """
+    global cv2, np, pytesseract
+    if _NOT_LOADED not in (cv2, np, pytesseract):
+        return
+    with _OCR_DEPS_LOCK:
+        if _NOT_LOADED not in (cv2, np, pytesseract):
+            return
+        try:
+            import cv2 as _cv2
+            import numpy as _np
+            import pytesseract as _pytesseract
+            # Windows fallback for Tesseract
+            if shutil.which("tesseract") is None:
+                common_paths = [
+                    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+                    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+                ]
+                for p in common_paths:
+                    if Path(p).exists():
+                        _pytesseract.pytesseract.tesseract_cmd = p
+                        logger.info(f"Tesseract found at: {p}")
+                        break
+        except ImportError as e:
+            logger.warning(f"Optional OCR dependencies not available: {e}")
+            _cv2 = _np = _pytesseract = None
+        if cv2 is _NOT_LOADED:
+            cv2 = _cv2
+        if np is _NOT_LOADED:
+            np = _np
+        if pytesseract is _NOT_LOADED:
+            pytesseract = _pytesseract
+
+# Optional multi-pattern matcher used to prefilter the metadata regexes.
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover
+    hyperscan = None
 
 # ----------------------------
 # Text Extraction Regexes
@@ -61,9 +101,78 @@ PATTERNS = {
     "total_pagar": [re.compile(r"(?:total\s*a\s*pagar|saldo\s*total)[:\.\s]*\$?\s*([\d,]+\.\d{2})", re.IGNORECASE)],
 }
 
+_AMOUNT_FIELDS = frozenset({"pago_minimo", "pago_no_intereses", "total_pagar"})
+
+
+def _compile_prefilter(patterns: Dict[str, List[re.Pattern]]):
+    """Compile every pattern into one Hyperscan database, or return None.
+
+    Pattern ids follow the iteration order of ``patterns``. Hyperscan cannot
+    report capture groups, so the database only says which patterns occur;
+    ``re`` still extracts the values.
+    """
+    if hyperscan is None:
+        return None
+    flat = [rx for regexes in patterns.values() for rx in regexes]
+    base = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[rx.pattern.encode("utf-8") for rx in flat],
+            ids=list(range(len(flat))),
+            flags=[base | (hyperscan.HS_FLAG_CASELESS if rx.flags & re.IGNORECASE else 0) for rx in flat],
+        )
+    except Exception as e:
+        logger.warning(f"Hyperscan compile failed, using re for metadata: {e}")
+        return None
+    return db
+
+
+_PATTERNS_DB = _compile_prefilter(PATTERNS)
+
+
+def _prefilter_hits(db, text: str) -> Optional[set]:
+    """Return ids of patterns that occur in ``text``, or None without a database."""
+    if db is None:
+        return None
+    hits: set = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        hits.add(pattern_id)
+
+    db.scan(text.encode("utf-8"), match_event_handler=on_match)
+    return hits
+
+
+# Runs of spaces/tabs in OCR output; newlines are kept because callers split on them.
+_HSPACE_RE = re.compile(r"[ \t]+")
+_WS_RE = re.compile(r"\s+")
+
+# Regex for typical transaction rows:
+# 1. Date (DD MMM or DD/MM/YY)
+# 2. Description (non-greedy match until amount)
+# 3. Amount (digits with optional thousands separator and mandatory decimal)
+_TXN_ROW_RE = re.compile(
+    r"(\d{1,2}(?:\s*[A-Z]{3}|[/-]\s*\d{1,2}\s*[/-]\s*\d{2,4}))\s+(.*?)\s+([-+]?[\d,\.\s]+[,\.]\d{2})",
+    re.IGNORECASE
+)
+
+# Upper bound on concurrent tesseract processes used by ocr_images
+_OCR_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# Pages rendered and held in memory per ocr_images call. A letter page is
+# ~17 MB after the 3x render and 2x upscale, so this bounds the peak at
+# roughly 140 MB however long the scanned statement is.
+_OCR_PAGE_BATCH = 8
+
+# Batch OCR page images are short-lived; keep them on tmpfs when there is one.
+_OCR_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+@functools.lru_cache(maxsize=4096)
 def clean_date_str(s: str) -> str:
     """Clean whitespace from date string."""
-    return re.sub(r"\s+", " ", s).strip()
+    return _WS_RE.sub(" ", s).strip()
 
 
 def parse_amount_str(s: str) -> Optional[float]:
@@ -76,13 +185,59 @@ def parse_amount_str(s: str) -> Optional[float]:
         Parsed float value, or None if parsing fails
     """
     try:
-        # Remove spaces and handle both comma/period separators
-        cleaned = s.replace(" ", "").replace(",", "")
+        # Remove spaces and handle both comma/period separators. Plain amounts
+        # like "1234.56" (the usual text-layer shape) skip the string copies.
+        cleaned = s
+        if "," in cleaned or " " in cleaned:
+            cleaned = cleaned.replace(" ", "").replace(",", "")
         return float(cleaned)
-    except (ValueError, AttributeError) as e:
+    except (ValueError, AttributeError, TypeError) as e:
         logger.warning(f"Failed to parse amount '{s}': {e}")
         return None
 
+# ----------------------------
+# Page Text Cache
+# ----------------------------
+
+# Text-layer extraction is the main cost of the non-OCR path, and a batch run
+# typically calls extract_pdf_metadata, extract_transactions_from_pdf and
+# collect_pdf_lines on the same file. Page text is cached per
+# (path, mtime_ns, size, page), so an edited file gets new keys automatically.
+_PAGE_TEXT_CACHE_SIZE = 256
+_PAGE_TEXT_CACHE: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+_PAGE_TEXT_LOCK = threading.Lock()
+
+
+def _pdf_cache_key(pdf_path: Path) -> Optional[Tuple[str, int, int]]:
+    """Identity of a PDF file on disk, or None if it cannot be stat'ed."""
+    try:
+        st = pdf_path.stat()
+    except OSError:
+        return None
+    return (str(pdf_path), st.st_mtime_ns, st.st_size)
+
+
+def _page_text(doc, file_key: Optional[Tuple[str, int, int]], page_idx: int) -> str:
+    """Return the text layer of a page, reusing earlier extractions of the same file.
+
+    Extraction errors propagate to the caller and are never cached.
+    """
+    if file_key is None:
+        return doc[page_idx].get_text()
+
+    key = file_key + (page_idx,)
+    with _PAGE_TEXT_LOCK:
+        if key in _PAGE_TEXT_CACHE:
+            _PAGE_TEXT_CACHE.move_to_end(key)
+            return _PAGE_TEXT_CACHE[key]
+
+    text = doc[page_idx].get_text()
+    with _PAGE_TEXT_LOCK:
+        _PAGE_TEXT_CACHE[key] = text
+        if len(_PAGE_TEXT_CACHE) > _PAGE_TEXT_CACHE_SIZE:
+            _PAGE_TEXT_CACHE.popitem(last=False)
+    return text
+
 # ----------------------------
 # OCR Helpers
 # ----------------------------
@@ -93,20 +248,28 @@ def preprocess_for_ocr(bgr):
     Applies grayscale conversion, Otsu thresholding, and upscaling.
 
     Args:
-        bgr: BGR image array
+        bgr: Page image array, either 3-channel RGB as returned by
+            ``render_page`` or already single-channel grayscale
 
     Returns:
         Preprocessed image ready for OCR
     """
+    _ensure_ocr_deps()
     if cv2 is None:
         logger.warning("OpenCV not available, skipping preprocessing")
         return bgr
 
     try:
-        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-        thr = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-        thr = cv2.resize(thr, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-        return thr
+        # Everything stays uint8. Grayscale input skips the colour pass and
+        # gets a fresh threshold buffer (it may be a read-only render view);
+        # otherwise the threshold is written back into the converted buffer.
+        if bgr.ndim == 2:
+            _, gray = cv2.threshold(bgr, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        else:
+            # PyMuPDF pixmaps are RGB, so use the matching luminance weights.
+            gray = cv2.cvtColor(bgr, cv2.COLOR_RGB2GRAY)
+            cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+        return cv2.resize(gray, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
     except Exception as e:
         logger.error(f"Image preprocessing failed: {e}")
         return bgr
@@ -122,6 +285,7 @@ def ocr_image(img, lang: str = "eng") -> str:
     Returns:
         Extracted text, or empty string if OCR fails
     """
+    _ensure_ocr_deps()
     if pytesseract is None:
         logger.warning("Tesseract not available for OCR")
         return ""
@@ -129,7 +293,7 @@ def ocr_image(img, lang: str = "eng") -> str:
     try:
         cfg = "--psm 6"  # Assume uniform text block
         txt = pytesseract.image_to_string(img, lang=lang, config=cfg)
-        txt = re.sub(r"[ \t]+", " ", txt)
+        txt = _HSPACE_RE.sub(" ", txt)
         logger.debug(f"OCR extracted {len(txt)} characters")
         return txt
     except Exception as e:
@@ -137,6 +301,72 @@ def ocr_image(img, lang: str = "eng") -> str:
         return ""
 
 
+def ocr_images(imgs: List[Any], lang: str = "eng") -> List[str]:
+    """Extract text from several images with as few Tesseract runs as possible.
+
+    pytesseract starts a new tesseract process for every call, and engine
+    start-up dominates short pages. The images are split into at most
+    ``_OCR_MAX_WORKERS`` contiguous chunks. Each chunk is one tesseract run
+    over an image-list file, and the chunks run in parallel threads (the real
+    work happens in the tesseract child processes).
+
+    Args:
+        imgs: Image arrays (already preprocessed)
+        lang: Tesseract language(s), e.g., "eng", "spa", "spa+eng"
+
+    Returns:
+        One text per input image, in the same order
+    """
+    _ensure_ocr_deps()
+    if len(imgs) < 2 or cv2 is None or pytesseract is None:
+        return [ocr_image(img, lang=lang) for img in imgs]
+
+    workers = min(_OCR_MAX_WORKERS, len(imgs))
+    if workers == 1:
+        return _ocr_chunk(imgs, lang)
+
+    size, extra = divmod(len(imgs), workers)
+    chunks, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(imgs[start:end])
+        start = end
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_ocr_chunk, chunks, [lang] * workers)
+        return [txt for chunk_texts in results for txt in chunk_texts]
+
+
+def _ocr_chunk(imgs: List[Any], lang: str) -> List[str]:
+    """OCR a chunk of images with one tesseract run, falling back per image."""
+    if len(imgs) < 2:
+        return [ocr_image(img, lang=lang) for img in imgs]
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="lsc_ocr_", dir=_OCR_TMP_DIR) as tmp:
+            tmp_dir = Path(tmp)
+            image_paths = []
+            for i, img in enumerate(imgs):
+                img_path = tmp_dir / f"page_{i:04d}.png"
+                if not cv2.imwrite(str(img_path), img):
+                    raise RuntimeError(f"could not write {img_path.name}")
+                image_paths.append(str(img_path))
+            list_path = tmp_dir / "pages.txt"
+            list_path.write_text("\n".join(image_paths) + "\n", encoding="utf-8")
+            txt = pytesseract.image_to_string(str(list_path), lang=lang, config="--psm 6")
+    except Exception as e:
+        logger.warning(f"Batch OCR failed, falling back to per-page OCR: {e}")
+        return [ocr_image(img, lang=lang) for img in imgs]
+
+    pages = txt.split("\f")
+    if len(pages) < len(imgs) or any(p.strip() for p in pages[len(imgs):]):
+        logger.warning(f"Batch OCR returned {len(pages)} pages for {len(imgs)} images, retrying per page")
+        return [ocr_image(img, lang=lang) for img in imgs]
+
+    logger.debug(f"Batch OCR extracted {len(txt)} characters from {len(imgs)} images")
+    return [_HSPACE_RE.sub(" ", page) for page in pages[:len(imgs)]]
+
+
 def render_page(doc, page_index: int, zoom: float = 2.0):
     """Render PDF page to image array.
 
@@ -146,26 +376,70 @@ def render_page(doc, page_index: int, zoom: float = 2.0):
         zoom: Zoom factor (higher = better quality, slower)
 
     Returns:
-        RGB image array, or None if rendering fails
+        RGB image array, or None if rendering fails. The array is read-only:
+        it wraps the bytes returned by ``pix.samples`` without a second copy,
+        so call ``.copy()`` before modifying it in place.
     """
-    if fitz is None:
-        logger.warning("PyMuPDF not available, cannot render page")
+    _ensure_ocr_deps()
+    if fitz is None or np is None:
+        logger.warning("PyMuPDF/NumPy not available, cannot render page")
         return None
 
     try:
         page = doc.load_page(page_index)
         mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
-        return img
+        # Force RGB: pages can render in the document's own colorspace (CMYK,
+        # gray), whose channels would be misread as RGB.
+        pix = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False)
+        if pix.n != 3:
+            raise ValueError(f"expected 3 RGB channels, got {pix.n}")
+        return np.ndarray((pix.height, pix.width, 3), dtype=np.uint8, buffer=pix.samples)
     except Exception as e:
         logger.error(f"Failed to render page {page_index}: {e}")
         return None
 
+def _ocr_pages(doc, page_indices: List[int], lang: str = "spa+eng") -> Iterator[Tuple[int, str]]:
+    """Render, preprocess and OCR pages, yielding ``(page_index, text)`` in order.
+
+    Pages go to ``ocr_images`` in windows of ``_OCR_PAGE_BATCH`` so only one
+    window of preprocessed images is alive at a time. Pages that fail to
+    render are skipped.
+    """
+    for start in range(0, len(page_indices), _OCR_PAGE_BATCH):
+        rendered = []
+        for page_idx in page_indices[start:start + _OCR_PAGE_BATCH]:
+            img = render_page(doc, page_idx, zoom=3.0)
+            if img is not None:
+                rendered.append((page_idx, preprocess_for_ocr(img)))
+        texts = ocr_images([gray for _, gray in rendered], lang=lang)
+        yield from zip((page_idx for page_idx, _ in rendered), texts)
+
+
 # ----------------------------
 # Main Extraction Logic
 # ----------------------------
 
+# Date formats accepted by parse_mx_date (matched against the upper-cased input).
+# The branches cannot overlap, so a single match picks the format: ISO
+# "2024-01-12", "12 ENE"/"12ENE", or numeric "12/01/24"/"12-01-2024".
+_MX_DATE_RE = re.compile(
+    r"(?P<iso_y>\d{4})[/-](?P<iso_m>\d{1,2})[/-](?P<iso_d>\d{1,2})"
+    r"|(?P<mon_d>\d{1,2})\s*(?P<mon>[A-Z]{3,10})"
+    r"|(?P<num_d>\d{1,2})\s*[/-]\s*(?P<num_m>\d{1,2})\s*[/-]\s*(?P<num_y>\d{2,4})"
+)
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_valid_day(year: int, month: int, day: int) -> bool:
+    """Check that ``day`` exists in ``month`` of ``year`` (leap years included)."""
+    if day < 1:
+        return False
+    if month == 2 and day == 29:
+        return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return day <= _DAYS_IN_MONTH[month - 1]
+
+
 def parse_mx_date(date_str: str, year: Optional[int] = None) -> Optional[str]:
     """Parse Mexican date formats to ISO format (YYYY-MM-DD).
 
@@ -194,67 +468,65 @@ def parse_mx_date(date_str: str, year: Optional[int] = None) -> Optional[str]:
         logger.debug(f"Invalid date_str: {date_str!r}")
         return None
 
-    s = date_str.upper().strip()
     if not year:
         year = datetime.now().year
+    result = _parse_mx_date_cached(date_str, year)
+    if result is None:
+        logger.debug("Could not parse date: %r", date_str)
+    return result
 
-    # Months mapping (Standard Spanish abbreviations and common OCR variations)
-    months = {
-        "ENE": "01", "ENERO": "01",
-        "FEB": "02", "FEBRERO": "02",
-        "MAR": "03", "MARZO": "03",
-        "ABR": "04", "ABRIL": "04",
-        "MAY": "05", "MAYO": "05",
-        "JUN": "06", "JUNIO": "06",
-        "JUL": "07", "JULIO": "07",
-        "AGO": "08", "AGOSTO": "08",
-        "SEP": "09", "SET": "09", "SEPTIEMBRE": "09",
-        "OCT": "10", "OCTUBRE": "10",
-        "NOV": "11", "NOVIEMBRE": "11",
-        "DIC": "12", "DICIEMBRE": "12",
-    }
-
-    # Try: Already ISO format "2024-01-12"
-    m = re.match(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})", s)
-    if m:
-        yr, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
-        if 1 <= day <= 31 and 1 <= month <= 12:
+
+@functools.lru_cache(maxsize=4096)
+def _parse_mx_date_cached(date_str: str, year: int) -> Optional[str]:
+    """Memoized body of ``parse_mx_date``; statements repeat the same dates a lot.
+
+    No logging here: a cached call would only log the first time. The caller
+    logs failures instead.
+    """
+    s = date_str.upper().strip()
+    m = _MX_DATE_RE.match(s)
+    if m is None:
+        return None
+
+    fmt = m.lastgroup
+    if fmt == "iso_d":
+        # Already ISO format "2024-01-12"
+        yr, month, day = int(m["iso_y"]), int(m["iso_m"]), int(m["iso_d"])
+        if 1 <= month <= 12 and _is_valid_day(yr, month, day):
             return f"{yr}-{month:02d}-{day:02d}"
 
-    # Try: "12 ENE" or "12ENE"
-    m = re.match(r"(\d{1,2})\s*([A-Z]{3,10})", s)
-    if m:
-        day = int(m.group(1))
-        month_str = m.group(2)
-        if not (1 <= day <= 31):
-            logger.debug(f"Invalid day in date: {day}")
-            return None
-        month = months.get(month_str)
+    elif fmt == "mon":
+        # "12 ENE" or "12ENE"
+        day = int(m["mon_d"])
+        month_str = m["mon"]
+        month = MONTH_PREFIX_MX.get(month_str[:3])
         if not month:
-            logger.debug(f"Unknown month abbreviation: {month_str}")
             return None
-        return f"{year}-{month}-{day:02d}"
-
-    # Try: "12/01/24" or "12-01-2024" (DD/MM/YY or DD/MM/YYYY)
-    m = re.match(r"(\d{1,2})\s*[/-]\s*(\d{1,2})\s*[/-]\s*(\d{2,4})", s)
-    if m:
-        day = int(m.group(1))
-        month = int(m.group(2))
-        yr = int(m.group(3))
-        if not (1 <= day <= 31):
-            logger.debug(f"Invalid day: {day}")
+        if not _is_valid_day(year, month, day):
             return None
+        return f"{year}-{month:02d}-{day:02d}"
+
+    else:
+        # "12/01/24" or "12-01-2024" (DD/MM/YY or DD/MM/YYYY)
+        day = int(m["num_d"])
+        month = int(m["num_m"])
+        yr = int(m["num_y"])
         if not (1 <= month <= 12):
-            logger.debug(f"Invalid month: {month}")
             return None
         if yr < 100:
             # Assume 2000s for two-digit years
             yr += 2000
+        if not _is_valid_day(yr, month, day):
+            return None
         return f"{yr}-{month:02d}-{day:02d}"
 
-    logger.debug(f"Could not parse date: {date_str!r}")
     return None
 
+
+# Any leap year: "DD MMM" rows then pass the filter for every real calendar date.
+_ROW_FILTER_YEAR = 2000
+
+
 def extract_transactions_from_pdf(pdf_path: Path, use_ocr: bool = False) -> List[Dict[str, Any]]:
     """Extract transaction rows from PDF using text extraction or OCR.
 
@@ -292,76 +564,57 @@ def extract_transactions_from_pdf(pdf_path: Path, use_ocr: bool = False) -> List
         logger.error(f"Failed to open PDF {pdf_path}: {e}")
         return []
 
-    txns = []
+    file_key = _pdf_cache_key(pdf_path)
+    # Rows are only kept or dropped here; the statement year is resolved by
+    # callers. Validate "DD MMM" dates against a leap year so a 29 FEB row is
+    # never lost just because the current year is not a leap year.
+    year = _ROW_FILTER_YEAR
 
-    # Regex for typical transaction rows:
-    # 1. Date (DD MMM or DD/MM/YY)
-    # 2. Description (non-greedy match until amount)
-    # 3. Amount (digits with optional thousands separator and mandatory decimal)
-    row_rx = re.compile(
-        r"(\d{1,2}(?:\s*[A-Z]{3}|[/-]\s*\d{1,2}\s*[/-]\s*\d{2,4}))\s+(.*?)\s+([-+]?[\d,\.\s]+[,\.]\d{2})",
-        re.IGNORECASE
-    )
+    page_count = doc.page_count
+    page_txns: List[List[Dict[str, Any]]] = [[] for _ in range(page_count)]
+    page_texts = [""] * page_count
+    page_methods = [""] * page_count
+    ocr_pages: List[int] = []
 
-    for page_idx in range(doc.page_count):
+    for page_idx in range(page_count):
         txt = ""
-        used_method = ""
 
         # 1. Try Text Extraction first (unless OCR is forced)
         if not use_ocr:
             try:
-                page = doc[page_idx]
-                txt = page.get_text()
+                txt = _page_text(doc, file_key, page_idx)
                 if len(txt.strip()) > 50:
-                    used_method = "Text Layer"
+                    page_methods[page_idx] = "Text Layer"
             except Exception as e:
                 logger.warning(f"Text extraction failed on page {page_idx + 1}: {e}")
 
         # 2. Parse text for transaction rows
-        sub_txns = []
         if txt:
-            for line in txt.splitlines():
-                m = row_rx.search(line)
-                if m and parse_mx_date(m.group(1)):
-                    amount = parse_amount_str(m.group(3).replace(",", "."))
-                    if amount is not None:
-                        sub_txns.append({
-                            "raw_date": m.group(1),
-                            "description": m.group(2).strip(),
-                            "amount": amount,
-                            "page": page_idx + 1,
-                            "line": line.strip()
-                        })
-
-        # 3. Fallback to OCR if no transactions found
-        if not sub_txns and pytesseract:
+            page_texts[page_idx] = txt
+            page_txns[page_idx] = _parse_transaction_lines(txt, page_idx + 1, year=year)
+
+        # 3. Queue for OCR if no transactions found; pages that parse from the
+        # text layer never load the OCR stack
+        if page_txns[page_idx]:
+            continue
+        _ensure_ocr_deps()
+        if pytesseract:
             logger.debug(f"No transactions found via text extraction on page {page_idx + 1}, trying OCR")
-            img = render_page(doc, page_idx, zoom=3.0)
-            if img is not None:
-                gray = preprocess_for_ocr(img)
-                txt = ocr_image(gray, lang="spa+eng")
-                used_method = "OCR (fallback)" if not use_ocr else "OCR (forced)"
-
-                for line in txt.splitlines():
-                    # Clean OCR artifacts
-                    line = line.replace(" - ", "-").replace(" $ ", "$").replace("$", "")
-                    m = row_rx.search(line)
-                    if m and parse_mx_date(m.group(1)):
-                        amount = parse_amount_str(m.group(3).replace(",", "."))
-                        if amount is not None:
-                            sub_txns.append({
-                                "raw_date": m.group(1),
-                                "description": m.group(2).strip(),
-                                "amount": amount,
-                                "page": page_idx + 1,
-                                "line": line.strip()
-                            })
-
-        logger.info(f"Page {page_idx + 1}: Used {used_method}. Found {len(sub_txns)} transactions.")
+            ocr_pages.append(page_idx)
+
+    # OCR queued pages in batched Tesseract runs instead of one run per page
+    for page_idx, txt in _ocr_pages(doc, ocr_pages):
+        page_texts[page_idx] = txt
+        page_methods[page_idx] = "OCR (fallback)" if not use_ocr else "OCR (forced)"
+        page_txns[page_idx] = _parse_transaction_lines(txt, page_idx + 1, from_ocr=True, year=year)
+
+    txns = []
+    for page_idx, sub_txns in enumerate(page_txns):
+        logger.info(f"Page {page_idx + 1}: Used {page_methods[page_idx]}. Found {len(sub_txns)} transactions.")
 
         # Debug first page if no results
-        if page_idx == 0 and not sub_txns and txt:
-            logger.debug(f"Page 1 text sample (first 200 chars):\n{txt[:200]}")
+        if page_idx == 0 and not sub_txns and page_texts[0]:
+            logger.debug(f"Page 1 text sample (first 200 chars):\n{page_texts[0][:200]}")
 
         txns.extend(sub_txns)
 
@@ -370,6 +623,35 @@ def extract_transactions_from_pdf(pdf_path: Path, use_ocr: bool = False) -> List
     return txns
 
 
+def _parse_transaction_lines(
+    text: str, page_no: int, from_ocr: bool = False, year: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Parse transaction rows out of one page of text (text layer or OCR).
+
+    ``year`` is forwarded to ``parse_mx_date`` for "DD MMM" rows, which only
+    decides whether a line is a transaction row. ``extract_transactions_from_pdf``
+    passes the leap year ``_ROW_FILTER_YEAR`` so every real calendar date,
+    29 FEB included, passes regardless of the current year.
+    """
+    sub_txns = []
+    for line in text.splitlines():
+        if from_ocr:
+            # Clean OCR artifacts
+            line = line.replace(" - ", "-").replace(" $ ", "$").replace("$", "")
+        m = _TXN_ROW_RE.search(line)
+        if m and parse_mx_date(m.group(1), year):
+            amount = parse_amount_str(m.group(3).replace(",", "."))
+            if amount is not None:
+                sub_txns.append({
+                    "raw_date": m.group(1),
+                    "description": m.group(2).strip(),
+                    "amount": amount,
+                    "page": page_no,
+                    "line": line.strip()
+                })
+    return sub_txns
+
+
 def collect_pdf_lines(pdf_path: Path, use_ocr: bool = False) -> List[Dict[str, Any]]:
     """
     Returns every text line from the PDF pages, including OCR fallback lines.
@@ -378,32 +660,64 @@ def collect_pdf_lines(pdf_path: Path, use_ocr: bool = False) -> List[Dict[str, A
         return []
 
     doc = fitz.open(str(pdf_path))
-    lines: List[Dict[str, Any]] = []
+    file_key = _pdf_cache_key(pdf_path)
+    page_texts: List[str] = []
+    page_methods: List[str] = []
+    ocr_pages: List[int] = []
 
     for page_idx in range(doc.page_count):
-        page = doc.load_page(page_idx)
-        text = page.get_text()
-        method = "text"
-        if not text.strip() and use_ocr and pytesseract:
-            img = render_page(doc, page_idx, zoom=3.0)
-            if img is not None:
-                gray = preprocess_for_ocr(img)
-                text = pytesseract.image_to_string(gray, lang="spa+eng", config="--psm 6")
-                method = "ocr"
+        text = _page_text(doc, file_key, page_idx)
+        page_texts.append(text)
+        page_methods.append("text")
+        if use_ocr and not text.strip():
+            _ensure_ocr_deps()
+            if pytesseract:
+                ocr_pages.append(page_idx)
+
+    # OCR pages without a text layer in batched Tesseract runs
+    for page_idx, text in _ocr_pages(doc, ocr_pages):
+        page_texts[page_idx] = text
+        page_methods[page_idx] = "ocr"
 
+    lines: List[Dict[str, Any]] = []
+    for page_idx, text in enumerate(page_texts):
+        page_no, method = page_idx + 1, page_methods[page_idx]
         for raw_line in text.splitlines():
             stripped = raw_line.strip()
-            if not stripped:
-                continue
-            lines.append({
-                "page": page_idx + 1,
-                "method": method,
-                "text": stripped
-            })
+            if stripped:
+                lines.append({"page": page_no, "method": method, "text": stripped})
 
     doc.close()
     return lines
 
+def _search_metadata(
+    text: str,
+    patterns: Dict[str, List[re.Pattern]],
+    metadata: Dict[str, Any],
+    db=None,
+    source: str = "",
+) -> None:
+    """Fill missing ``metadata`` fields from the first matching pattern per field."""
+    hits = _prefilter_hits(db, text)
+    pattern_id = -1
+    for key, regexes in patterns.items():
+        for rx in regexes:
+            pattern_id += 1
+            if key in metadata or (hits is not None and pattern_id not in hits):
+                continue
+            m = rx.search(text)
+            if m:
+                val = m.group(1)
+                if key in _AMOUNT_FIELDS:
+                    parsed_amount = parse_amount_str(val)
+                    if parsed_amount is not None:
+                        metadata[key] = parsed_amount
+                else:
+                    metadata[key] = clean_date_str(val)
+                logger.debug(f"Found {key}{source}: {val}")
+                break  # Found match for this key
+
+
 def extract_pdf_metadata(pdf_path: Path, patterns: Optional[Dict[str, List[re.Pattern]]] = None) -> Dict[str, Any]:
     """Extract metadata (dates, amounts) from PDF statement.
 
@@ -412,7 +726,9 @@ def extract_pdf_metadata(pdf_path: Path, patterns: Optional[Dict[str, List[re.Pa
 
     Args:
         pdf_path: Path to PDF file
-        patterns: Custom regex patterns dict, or None to use defaults
+        patterns: Custom mapping of field name to a list of already compiled
+            ``re.Pattern`` objects (same shape as ``PATTERNS``), or None to use
+            the module defaults. Patterns are never compiled here.
 
     Returns:
         Dictionary with extracted metadata fields:
@@ -453,29 +769,21 @@ def extract_pdf_metadata(pdf_path: Path, patterns: Optional[Dict[str, List[re.Pa
     page1_text = ""
     if doc.page_count > 0:
         try:
-            page1_text = doc[0].get_text()
+            page1_text = _page_text(doc, _pdf_cache_key(pdf_path), 0)
             logger.debug(f"Extracted {len(page1_text)} characters from page 1")
         except Exception as e:
             logger.warning(f"Failed to extract text from page 1: {e}")
 
-    # Search patterns in extracted text
-    for key, regexes in active_patterns.items():
-        for rx in regexes:
-            m = rx.search(page1_text)
-            if m:
-                val = m.group(1)
-                if key in ["pago_minimo", "pago_no_intereses", "total_pagar"]:
-                    parsed_amount = parse_amount_str(val)
-                    if parsed_amount is not None:
-                        metadata[key] = parsed_amount
-                else:
-                    metadata[key] = clean_date_str(val)
-                logger.debug(f"Found {key}: {val}")
-                break  # Found match for this key
+    # Search patterns in extracted text; the Hyperscan prefilter only applies
+    # to the default patterns it was compiled from.
+    active_db = _PATTERNS_DB if active_patterns is PATTERNS else None
+    _search_metadata(page1_text, active_patterns, metadata, db=active_db)
 
     # 2. OCR Fallback (only if missing critical data)
     missing_critical = not ("cutoff_date" in metadata and "total_pagar" in metadata)
 
+    if missing_critical:
+        _ensure_ocr_deps()
     if missing_critical and cv2 is not None and pytesseract is not None:
         logger.info("Missing critical metadata, attempting OCR on page 1 header")
         img = render_page(doc, 0, zoom=2.0)
@@ -487,21 +795,7 @@ def extract_pdf_metadata(pdf_path: Path, patterns: Optional[Dict[str, List[re.Pa
             txt_ocr = ocr_image(preprocessed, lang="spa+eng").lower()
 
             # Re-run patterns on OCR text
-            for key, regexes in active_patterns.items():
-                if key in metadata:
-                    continue  # Already found via text extraction
-                for rx in regexes:
-                    m = rx.search(txt_ocr)
-                    if m:
-                        val = m.group(1)
-                        if key in ["pago_minimo", "pago_no_intereses", "total_pagar"]:
-                            parsed_amount = parse_amount_str(val)
-                            if parsed_amount is not None:
-                                metadata[key] = parsed_amount
-                        else:
-                            metadata[key] = clean_date_str(val)
-                        logger.debug(f"Found {key} via OCR: {val}")
-                        break
+            _search_metadata(txt_ocr, active_patterns, metadata, db=active_db, source=" via OCR")
 
     doc.close()
     logger.info(f"Extracted {len(metadata)} metadata fields from {pdf_path.name}")
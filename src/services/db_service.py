@@ -10,6 +10,10 @@ from settings import load_settings
 
 logger = get_logger("db_service")
 
+# json.dumps builds a fresh encoder on every call once any option is passed;
+# audit payloads reuse one with the same settings (identical output).
+_encode_payload = json.JSONEncoder(ensure_ascii=False).encode
+
 
 class DatabaseService:
     def __init__(
@@ -28,6 +32,11 @@ class DatabaseService:
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
+        # Under WAL (enabled in initialize) a sync at checkpoints is enough for
+        # crash safety, so skip the fsync on every commit. Rollback-journal
+        # databases keep the default FULL.
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            conn.execute("PRAGMA synchronous = NORMAL")
         return conn
 
     def initialize(self) -> None:
@@ -35,6 +44,8 @@ class DatabaseService:
             raise FileNotFoundError(f"Schema file not found: {self.schema_path}")
         sql = self.schema_path.read_text(encoding="utf-8")
         with self._connect() as conn:
+            # Persistent per database file; readers no longer block the writer.
+            conn.execute("PRAGMA journal_mode = WAL")
             self._ensure_transactions_columns(conn)
             conn.executescript(sql)
             self._ensure_transactions_columns(conn)
@@ -449,7 +460,7 @@ class DatabaseService:
         entity_id: Optional[str] = None,
         payload: Optional[Dict[str, Any]] = None,
     ) -> int:
-        payload_json = json.dumps(payload or {}, ensure_ascii=False)
+        payload_json = _encode_payload(payload or {})
         with self._connect() as conn:
             cur = conn.execute(
                 """
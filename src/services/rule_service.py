@@ -1,23 +1,123 @@
+import json
+import os
+import pickle
+import shutil
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Set, Tuple
 
 import yaml
 from services.db_service import DatabaseService
 
+try:
+    from yaml import CSafeDumper as _YamlDumper, CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper as _YamlDumper, SafeLoader as _YamlLoader
 
-def _load_yaml(path: Path) -> Dict[str, Any]:
-    if not path.exists():
-        return {}
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
-    return data or {}
 
+# Parsed YAML keyed by (path, mtime_ns, size, inode). Each entry holds the
+# pickled document, so every mutable hit hands back a fresh copy (unpickling
+# is far cheaper than re-parsing), plus a shared instance built on the first
+# read-only hit. Oldest entries are evicted first.
+_LOAD_CACHE_SIZE = 64
+_LOAD_CACHE: Dict[Tuple[str, int, int, int], List[Any]] = {}
+_LOAD_CACHE_LOCK = threading.Lock()
 
-def _write_yaml_atomic(path: Path, data: Dict[str, Any]) -> None:
+
+def _forget_cached(path: Path) -> None:
+    name = str(path)
+    with _LOAD_CACHE_LOCK:
+        for key in [k for k in _LOAD_CACHE if k[0] == name]:
+            del _LOAD_CACHE[key]
+
+
+def _load_yaml(path: Path, *, mutate: bool = True) -> Dict[str, Any]:
+    """Load a YAML mapping through the stat-keyed cache.
+
+    With ``mutate=False`` the cached instance itself is returned, skipping the
+    copy; callers MUST NOT modify it (or anything reachable from it).
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+    with _LOAD_CACHE_LOCK:
+        entry = _LOAD_CACHE.get(key)
+    if entry is not None:
+        if mutate:
+            return pickle.loads(entry[0])
+        if entry[1] is None:
+            entry[1] = pickle.loads(entry[0])
+        return entry[1]
+
+    # Hand libyaml the raw bytes; it detects the encoding and decodes in C.
+    with path.open("rb") as f:
+        data = yaml.load(f, Loader=_YamlLoader) or {}
+    entry = [pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), None if mutate else data]
+    _forget_cached(path)
+    with _LOAD_CACHE_LOCK:
+        if len(_LOAD_CACHE) >= _LOAD_CACHE_SIZE:
+            del _LOAD_CACHE[next(iter(_LOAD_CACHE))]
+        _LOAD_CACHE[key] = entry
+    return data
+
+
+def _write_text_atomic(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(yaml.safe_dump(data, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(text.encode("utf-8"))
+        f.flush()
+        # Make the new content durable before the rename can expose it.
+        os.fsync(f.fileno())
     tmp.replace(path)
+    _forget_cached(path)
+
+
+def _write_yaml_atomic(path: Path, data: Dict[str, Any]) -> None:
+    _write_text_atomic(path, yaml.dump(data, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True))
+
+
+def _yaml_scalar(value: Any) -> str:
+    # A JSON string is a valid YAML double-quoted scalar as long as it has no
+    # raw line breaks or control characters, which isprintable() rules out.
+    if not isinstance(value, str) or not value.isprintable():
+        raise ValueError(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _dump_pending(payload: Dict[str, Any]) -> str:
+    """Serialize the pending-rules payload.
+
+    Rules shaped like ``build_rule`` output are emitted from a fixed template,
+    which is several times faster than the generic dumper. Anything else
+    (hand-edited rules, odd characters) goes through ``yaml.dump``.
+    """
+    try:
+        out = [
+            f"updated_at_utc: {_yaml_scalar(payload['updated_at_utc'])}\n",
+            "pending_rules:\n" if payload["pending_rules"] else "pending_rules: []\n",
+        ]
+        for rule in payload["pending_rules"]:
+            set_block = rule["set"]
+            regexes, tags = rule["any_regex"], set_block["tags"]
+            if (
+                rule.keys() != {"name", "any_regex", "set"}
+                or set_block.keys() != {"expense", "tags"}
+                or not (isinstance(regexes, list) and regexes and isinstance(tags, list) and tags)
+            ):
+                raise ValueError(rule)
+            out.append(f"- name: {_yaml_scalar(rule['name'])}\n  any_regex:\n")
+            out.extend(f"  - {_yaml_scalar(rx)}\n" for rx in regexes)
+            out.append(f"  set:\n    expense: {_yaml_scalar(set_block['expense'])}\n    tags:\n")
+            out.extend(f"    - {_yaml_scalar(tag)}\n" for tag in tags)
+        return "".join(out)
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return yaml.dump(payload, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True)
 
 
 def build_rule(merchant_name: str, regex_pattern: str, expense_account: str, bucket_tag: str) -> Dict[str, Any]:
@@ -32,21 +132,42 @@ def build_rule(merchant_name: str, regex_pattern: str, expense_account: str, buc
 
 
 def _rule_regexes(rule: Dict[str, Any]) -> List[str]:
-    return [str(rx).strip() for rx in (rule.get("any_regex", []) or []) if str(rx).strip()]
+    # Strip each entry once (the walrus keeps it out of the filter clause).
+    return [rx for raw in (rule.get("any_regex", []) or []) if (rx := str(raw).strip())]
+
+
+@dataclass
+class RuleStore:
+    """Name and regex sets of a rule collection, for O(|candidate|) conflict checks.
+
+    Kept up to date with ``add`` so a merge can test each pending rule against
+    everything accepted so far without rescanning the rule list.
+    """
+
+    names: Set[str] = field(default_factory=set)
+    regexes: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_rules(cls, rules: List[Dict[str, Any]]) -> "RuleStore":
+        return cls(
+            names={str(rule.get("name", "")).strip() for rule in rules},
+            regexes={rx for rule in rules for rx in _rule_regexes(rule)},
+        )
+
+    def add(self, rule: Dict[str, Any]) -> None:
+        self.names.add(str(rule.get("name", "")).strip())
+        self.regexes.update(_rule_regexes(rule))
+
+    def conflicts(self, candidate_rule: Dict[str, Any]) -> List[str]:
+        candidate_name = str(candidate_rule.get("name", "")).strip()
+        found = [f"regex:{rx}" for rx in self.regexes.intersection(_rule_regexes(candidate_rule))]
+        if candidate_name and candidate_name in self.names:
+            found.append(f"name:{candidate_name}")
+        return sorted(found)
 
 
 def detect_conflicts(existing_rules: List[Dict[str, Any]], candidate_rule: Dict[str, Any]) -> List[str]:
-    conflicts: List[str] = []
-    candidate_name = str(candidate_rule.get("name", "")).strip()
-    candidate_rx = set(_rule_regexes(candidate_rule))
-    for rule in existing_rules:
-        name = str(rule.get("name", "")).strip()
-        if candidate_name and candidate_name == name:
-            conflicts.append(f"name:{candidate_name}")
-        overlap = candidate_rx.intersection(set(_rule_regexes(rule)))
-        for rx in sorted(overlap):
-            conflicts.append(f"regex:{rx}")
-    return sorted(set(conflicts))
+    return RuleStore.from_rules(existing_rules).conflicts(candidate_rule)
 
 
 def stage_rule_change(
@@ -58,7 +179,7 @@ def stage_rule_change(
     bucket_tag: str,
     db_path: Path = None,
 ) -> Tuple[bool, Dict[str, Any]]:
-    config = _load_yaml(rules_path)
+    config = _load_yaml(rules_path, mutate=False)
     existing = config.get("rules", [])
     candidate = build_rule(merchant_name, regex_pattern, expense_account, bucket_tag)
     conflicts = detect_conflicts(existing, candidate)
@@ -76,7 +197,7 @@ def stage_rule_change(
         "updated_at_utc": datetime.now(timezone.utc).isoformat(),
         "pending_rules": pending_rules,
     }
-    _write_yaml_atomic(pending_path, payload)
+    _write_text_atomic(pending_path, _dump_pending(payload))
     if db_path:
         db = DatabaseService(db_path=Path(db_path))
         db.initialize()
@@ -103,23 +224,29 @@ def merge_pending_rules(
     if not pending_path.exists():
         return False, {"status": "no_pending"}
 
-    config = _load_yaml(rules_path)
-    rules = list(config.get("rules", []))
+    # Check the (small) pending file first so an empty queue never pays for
+    # parsing the full rules file.
     pending = _load_yaml(pending_path)
     pending_rules = pending.get("pending_rules", [])
     if not pending_rules:
         return False, {"status": "no_pending"}
+    config = _load_yaml(rules_path)
+    rules = list(config.get("rules", []))
 
     conflicts: List[Dict[str, Any]] = []
     merged: List[Dict[str, Any]] = []
     working = list(rules)
+    # Index existing rules once and extend it as candidates merge, instead of
+    # rescanning every rule for each pending candidate.
+    store = RuleStore.from_rules(working)
     for candidate in pending_rules:
-        found = detect_conflicts(working, candidate)
+        found = store.conflicts(candidate)
         if found:
             conflicts.append({"rule": candidate.get("name", "unknown"), "conflicts": found})
             continue
         merged.append(candidate)
         working.insert(0, candidate)
+        store.add(candidate)
 
     if conflicts:
         return False, {"status": "conflict", "conflicts": conflicts, "mergeable_count": len(merged)}
@@ -127,11 +254,12 @@ def merge_pending_rules(
     backup_dir.mkdir(parents=True, exist_ok=True)
     ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
     backup_path = backup_dir / f"rules.{ts}.yml"
-    backup_path.write_text(rules_path.read_text(encoding="utf-8"), encoding="utf-8")
+    shutil.copy2(rules_path, backup_path)
 
     config["rules"] = working
     _write_yaml_atomic(rules_path, config)
     pending_path.unlink(missing_ok=True)
+    _forget_cached(pending_path)
     if db_path:
         db = DatabaseService(db_path=Path(db_path))
         db.initialize()
@@ -175,7 +303,7 @@ def sync_rules_to_db(db: DatabaseService, rules_path: Path) -> int:
     Uses a fetch-then-insert pattern to avoid duplicates — re-runs are safe.
     Returns count of newly inserted rows.
     """
-    data = _load_yaml(rules_path)
+    data = _load_yaml(rules_path, mutate=False)
     rules = data.get("rules", []) if data else []
     inserted = 0
     for rule in rules:
@@ -192,9 +320,26 @@ def sync_rules_to_db(db: DatabaseService, rules_path: Path) -> int:
 
 
 def get_pending_count(pending_path: Path) -> int:
-    if not pending_path.exists():
+    # Polled for UI badges: one stat answers the missing/empty cases.
+    try:
+        if pending_path.stat().st_size == 0:
+            return 0
+    except FileNotFoundError:
         return 0
-    pending = _load_yaml(pending_path)
+    # Only the length is needed: compose the node graph and count the
+    # sequence items instead of constructing every rule dict.
+    with pending_path.open("rb") as f:
+        root = yaml.compose(f, Loader=_YamlLoader)
+    if root is None:
+        return 0
+    if isinstance(root, yaml.MappingNode):
+        for key, value in root.value:
+            if isinstance(key, yaml.ScalarNode) and key.value == "pending_rules":
+                if isinstance(value, yaml.SequenceNode):
+                    return len(value.value)
+                break
+    # Unusual shapes (merge keys, null, non-mapping roots) keep the old path.
+    pending = _load_yaml(pending_path, mutate=False)
     return len(pending.get("pending_rules", []))
 
 
@@ -42,6 +42,9 @@ def load_settings() -> Settings:
     # Explicit local .env loading keeps CLI and Streamlit behavior consistent.
     dotenv_path = Path(os.getenv("LSC_DOTENV_PATH", ".env"))
     _load_dotenv(dotenv_path=dotenv_path, override=False)
+    # OCR runs several tesseract processes in parallel (pdf_utils.ocr_images);
+    # one OpenMP thread each keeps them from oversubscribing the CPU.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
     root_dir = Path(os.getenv("LSC_ROOT_DIR", Path(__file__).resolve().parents[1]))
     config_dir = Path(os.getenv("LSC_CONFIG_DIR", root_dir / "config"))
@@ -1,7 +1,35 @@
+import functools
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
 from rapidfuzz import fuzz, process
 
+_DIGITS_RE = re.compile(r"\d+")
+_WS_RE = re.compile(r"\s+")
+# rapidfuzz only treats ASCII whitespace as a token separator in strings that
+# fit in Latin-1; str.split() would also break on NBSP (U+00A0) and NEL (U+0085).
+_LATIN1_SEP_RE = re.compile(r"[\t\n\x0b\x0c\r\x1c-\x1f ]+")
+
+def _sort_tokens(text: str) -> str:
+    """Token-sorted form of ``text``, split the way ``fuzz.token_sort_ratio`` splits it."""
+    if text.isascii() or max(text) <= "\xff":
+        tokens = _LATIN1_SEP_RE.split(text)
+    else:
+        tokens = text.split()
+    return " ".join(sorted(t for t in tokens if t))
+
+
+@functools.lru_cache(maxsize=8)
+def _prep_choices(choices: Tuple[str, ...]) -> List[Optional[str]]:
+    """Token-sorted form of each choice, cached for repeated searches over one list.
+
+    Non-string entries (``None``, NaN, ``pd.NA``) become ``None`` so rapidfuzz
+    keeps skipping them.
+    """
+    return [_sort_tokens(c) if isinstance(c, str) else None for c in choices]
+
+
 def find_similar_merchants(target: str, existing_merchants: List[str], threshold: int = 70) -> List[Tuple[str, float]]:
     """
     Finds merchants in the existing list that are similar to the target string.
@@ -9,16 +37,61 @@ def find_similar_merchants(target: str, existing_merchants: List[str], threshold
     """
     if not target or not existing_merchants:
         return []
-    
-    # Use token_sort_ratio to be robust against word order (e.g. "WALMART CASHI" vs "CASHI WALMART")
+
+    # token_sort_ratio (robust against word order, e.g. "WALMART CASHI" vs
+    # "CASHI WALMART") is plain ratio over token-sorted strings. Sorting the
+    # choices once per merchant list and scoring with ratio skips re-tokenizing
+    # every merchant on every search. score_cutoff lets rapidfuzz drop weak
+    # candidates inside its C++ loop.
     matches = process.extract(
-        target, 
-        existing_merchants, 
-        scorer=fuzz.token_sort_ratio, 
+        _sort_tokens(target),
+        _prep_choices(tuple(existing_merchants)),
+        scorer=fuzz.ratio,
+        score_cutoff=threshold,
         limit=5
     )
-    
-    return [(m, score) for m, score, _ in matches if score >= threshold]
+
+    return [(existing_merchants[idx], float(score)) for _, score, idx in matches]
+
+
+def find_similar_merchants_batch(
+    queries: List[str], existing_merchants: List[str], threshold: int = 70
+) -> List[List[Tuple[str, float]]]:
+    """
+    Batch form of ``find_similar_merchants``: one result list per query, in order.
+    Scores every query against the merchant list in a single multi-threaded
+    ``cdist`` call instead of one Python-level search per query.
+    """
+    if not queries:
+        return []
+    if not existing_merchants:
+        return [[] for _ in queries]
+
+    choices = _prep_choices(tuple(existing_merchants))
+    scores = process.cdist(
+        [_sort_tokens(q) if isinstance(q, str) else "" for q in queries],
+        choices,
+        scorer=fuzz.ratio,
+        score_cutoff=threshold,
+        dtype=np.float64,
+        workers=-1,
+    )
+    # cdist reports sub-cutoff pairs as 0, so filter on the cutoff itself;
+    # Missing (None/NaN) choices are skipped the way process.extract skips them.
+    keep = scores >= threshold
+    keep[:, [c is None for c in choices]] = False
+
+    results: List[List[Tuple[str, float]]] = []
+    for query, row, mask in zip(queries, scores, keep):
+        if not isinstance(query, str) or not query:
+            results.append([])
+            continue
+        idx = np.flatnonzero(mask)
+        # Highest score first, ties by list position (process.extract order).
+        top = idx[np.lexsort((idx, -row[idx]))[:5]]
+        results.append([(existing_merchants[i], float(row[i])) for i in top])
+    return results
+
 
 def normalize_for_matching(text: str) -> str:
     """
@@ -30,7 +103,7 @@ def normalize_for_matching(text: str) -> str:
     # Lowercase
     s = text.lower()
     # Remove numbers
-    s = re.sub(r"\d+", "", s)
+    s = _DIGITS_RE.sub("", s)
     # Remove extra whitespace
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s
@@ -1,8 +1,33 @@
+import functools
+import logging
 import sys
 from pathlib import Path
 
+import pytest
+import yaml
+
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _quiet_importer():
+    """Swap the shared "importer" logger's stream output for a NullHandler.
+
+    Records still propagate so ``caplog`` keeps working; only stderr writes go away.
+    """
+    lg = logging.getLogger("importer")
+    lg.handlers = [logging.NullHandler()]
+    lg.setLevel(logging.INFO)
+    lg.propagate = True
+    yield
+
+
+@pytest.fixture(scope="session")
+def dump_yaml():
+    """``yaml.dump`` bound to the libyaml safe dumper for seeding test files."""
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return functools.partial(yaml.dump, Dumper=dumper, sort_keys=False, allow_unicode=True)
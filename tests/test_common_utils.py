@@ -316,6 +316,16 @@ class TestClassify:
         assert expense == "Expenses:Other"
         assert "merchant:unknown" in tags
 
+    def test_rule_reloads_reuse_compiled_patterns(self):
+        """Rebuilding rules from config reuses the already compiled regexes."""
+        first = CategorizationRule("Oxxo", ["oxxo"], RuleAction("Expenses:Food"))
+        again = CategorizationRule("Oxxo", ["oxxo"], RuleAction("Expenses:Food"))
+        alias = MerchantAlias("oxxo", ["oxxo"])
+
+        assert again.compiled_regexes[0] is first.compiled_regexes[0]
+        assert alias.compiled_regexes[0] is first.compiled_regexes[0]
+        assert first.compiled_regexes[0].flags & re.IGNORECASE
+
 
 # ===========================
 # Clean Description Tests
@@ -184,6 +184,20 @@ def test_record_audit_event(tmp_path):
     assert row["entity_id"] == "abc123"
 
 
+def test_initialize_enables_wal(tmp_path):
+    db = DatabaseService(db_path=tmp_path / "ledger.db")
+    db.initialize()
+    assert db.fetch_one("PRAGMA journal_mode")["journal_mode"] == "wal"
+
+
+def test_synchronous_normal_only_under_wal(tmp_path):
+    db = DatabaseService(db_path=tmp_path / "ledger.db")
+    # Before initialize() the file is still in rollback-journal mode: keep FULL (2).
+    assert db.fetch_one("PRAGMA synchronous")["synchronous"] == 2
+    db.initialize()
+    assert db.fetch_one("PRAGMA synchronous")["synchronous"] == 1
+
+
 def test_dashboard_metrics_view_exists(tmp_path):
     db = DatabaseService(db_path=tmp_path / "test.db")
     db.initialize()
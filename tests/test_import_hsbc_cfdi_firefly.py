@@ -858,7 +858,9 @@ def test_main_csv_source(tmp_path, fixtures_dir):
         "import_hsbc_cfdi_firefly.py",
         "--csv", str(csv_file),
         "--rules", str(rules_path),
-        "--out", str(tmp_path / "out.csv")
+        "--out", str(tmp_path / "out.csv"),
+        "--unknown-out", str(tmp_path / "unknown.csv"),
+        "--suggestions-out", str(tmp_path / "suggestions.yml"),
     ]
     
     with patch("sys.argv", test_args):
@@ -885,7 +887,9 @@ def test_main_xlsx_source(mock_read_excel, tmp_path, fixtures_dir):
         "import_hsbc_cfdi_firefly.py",
         "--xml", str(xlsx_file),
         "--rules", str(rules_path),
-        "--out", str(tmp_path / "out.csv")
+        "--out", str(tmp_path / "out.csv"),
+        "--unknown-out", str(tmp_path / "unknown.csv"),
+        "--suggestions-out", str(tmp_path / "suggestions.yml"),
     ]
     
     with patch("sys.argv", test_args):
@@ -915,7 +919,9 @@ def test_main_pdf_source(mock_parse_date, mock_extract_txns, mock_meta, tmp_path
         "--pdf", str(pdf_file),
         "--pdf-source",
         "--rules", str(rules_path),
-        "--out", str(tmp_path / "out.csv")
+        "--out", str(tmp_path / "out.csv"),
+        "--unknown-out", str(tmp_path / "unknown.csv"),
+        "--suggestions-out", str(tmp_path / "suggestions.yml"),
     ]
     
     with patch("sys.argv", test_args):
@@ -940,7 +946,9 @@ def test_main_xml_and_pdf_reconcile(mock_meta, tmp_path, fixtures_dir):
         "--xml", str(xml_path),
         "--pdf", str(pdf_file),
         "--rules", str(rules_path),
-        "--out", str(tmp_path / "out.csv")
+        "--out", str(tmp_path / "out.csv"),
+        "--unknown-out", str(tmp_path / "unknown.csv"),
+        "--suggestions-out", str(tmp_path / "suggestions.yml"),
     ]
     
     with patch("sys.argv", test_args):
@@ -21,7 +21,7 @@ class TestGetLogger:
 
     def test_logger_has_stream_handler(self):
         """Test that logger has a StreamHandler attached."""
-        logger = get_logger("test_stream")
+        logger = get_logger("test_stream_unique")
         assert len(logger.handlers) > 0
         assert any(isinstance(h, logging.StreamHandler) for h in logger.handlers)
 
@@ -97,6 +97,13 @@ class TestBuildRunLog:
             mock_datetime.now.assert_called_once_with(timezone.utc)
             assert "timestamp_utc" in log
 
+    def test_timestamp_has_second_precision(self):
+        """Test that timestamp omits the microsecond component."""
+        log = build_run_log("test", 0, 0, 0)
+        parsed = datetime.fromisoformat(log["timestamp_utc"])
+        assert parsed.microsecond == 0
+        assert parsed.utcoffset().total_seconds() == 0
+
     def test_includes_optional_metadata(self):
         """Test that optional metadata is included."""
         metadata = {"source_file": "test.pdf", "pages": 5}
@@ -41,6 +41,11 @@ def test_pick_family_matches_known_patterns_and_fallback():
     assert ms.pick_family("unknown_merchant", []) == "other"
 
 
+def test_pick_family_prefers_declaration_order_over_match_position():
+    # "cinepolis" appears first in the text, but "oxxo" is declared first.
+    assert ms.pick_family("cinepolis_oxxo", []) == "oxxo"
+
+
 def test_family_defaults_contains_expected_keys():
     defaults = ms.family_defaults()
     assert "oxxo" in defaults
@@ -13,19 +13,37 @@ def test_train_from_csvs_returns_false_when_no_files_exist(tmp_path):
     assert engine.train_from_csvs([tmp_path / "missing.csv"]) is False
 
 
-def test_train_from_csvs_returns_false_when_rows_below_threshold(tmp_path):
-    csv_path = tmp_path / "small_firefly.csv"
-    pd.DataFrame(
+def test_train_from_dataframes_returns_false_when_rows_below_threshold():
+    df = pd.DataFrame(
         [
             {"type": "withdrawal", "description": "A", "destination_name": "Expenses:Food"},
             {"type": "withdrawal", "description": "B", "destination_name": "Expenses:Food"},
             {"type": "withdrawal", "description": "C", "destination_name": "Expenses:Food"},
             {"type": "transfer", "description": "PAGO", "destination_name": "Liabilities:CC"},
         ]
+    )
+
+    engine = ml.TransactionCategorizer()
+    assert engine.train_from_dataframes([df]) is False
+
+
+@pytest.mark.parametrize("engine_name", ["pyarrow", "c"])
+def test_train_from_csvs_reads_files_and_trains(tmp_path, monkeypatch, engine_name):
+    monkeypatch.setattr(ml, "CSV_ENGINE", engine_name)
+    csv_path = tmp_path / "train_firefly.csv"
+    pd.DataFrame(
+        [
+            {"type": "withdrawal", "description": "OXXO ANTEA", "destination_name": "Expenses:Food:Convenience"},
+            {"type": "withdrawal", "description": "OXXO JURIQUILLA", "destination_name": "Expenses:Food:Convenience"},
+            {"type": "withdrawal", "description": "WALMART QRO", "destination_name": "Expenses:Food:Groceries"},
+            {"type": "withdrawal", "description": "WAL MART ANTEA", "destination_name": "Expenses:Food:Groceries"},
+            {"type": "withdrawal", "description": "NETFLIX", "destination_name": "Expenses:Entertainment:Subscriptions"},
+        ]
     ).to_csv(csv_path, index=False)
 
     engine = ml.TransactionCategorizer()
-    assert engine.train_from_csvs([csv_path]) is False
+    assert engine.train_from_csvs([csv_path]) is True
+    assert engine.is_trained is True
 
 
 def test_train_predict_save_and_load_model_roundtrip(tmp_path, monkeypatch):
@@ -33,8 +51,7 @@ def test_train_predict_save_and_load_model_roundtrip(tmp_path, monkeypatch):
     monkeypatch.setattr(ml, "MODEL_DIR", model_dir)
     monkeypatch.setattr(ml, "MODEL_PATH", model_dir / "categorizer_v1.joblib")
 
-    csv_path = tmp_path / "train_firefly.csv"
-    pd.DataFrame(
+    df = pd.DataFrame(
         [
             {"type": "withdrawal", "description": "OXXO ANTEA", "destination_name": "Expenses:Food:Convenience"},
             {"type": "withdrawal", "description": "OXXO JURIQUILLA", "destination_name": "Expenses:Food:Convenience"},
@@ -43,10 +60,10 @@ def test_train_predict_save_and_load_model_roundtrip(tmp_path, monkeypatch):
             {"type": "withdrawal", "description": "NETFLIX", "destination_name": "Expenses:Entertainment:Subscriptions"},
             {"type": "withdrawal", "description": "SPOTIFY", "destination_name": "Expenses:Entertainment:Subscriptions"},
         ]
-    ).to_csv(csv_path, index=False)
+    )
 
     engine = ml.TransactionCategorizer()
-    assert engine.train_from_csvs([csv_path]) is True
+    assert engine.train_from_dataframes([df]) is True
     assert engine.is_trained is True
     assert len(engine.classes_) >= 2
 
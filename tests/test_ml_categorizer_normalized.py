@@ -8,9 +8,8 @@ import ml_categorizer as ml
 pytestmark = pytest.mark.slow
 
 
-def test_train_prefers_normalized_description_when_available(tmp_path, monkeypatch):
-    csv_path = tmp_path / "train_firefly.csv"
-    pd.DataFrame(
+def test_train_prefers_normalized_description_when_available(monkeypatch):
+    df = pd.DataFrame(
         [
             {"type": "withdrawal", "description": "RAW A", "normalized_description": "NORMAL A", "destination_name": "Expenses:A"},
             {"type": "withdrawal", "description": "RAW B", "normalized_description": "NORMAL B", "destination_name": "Expenses:B"},
@@ -18,7 +17,7 @@ def test_train_prefers_normalized_description_when_available(tmp_path, monkeypat
             {"type": "withdrawal", "description": "RAW D", "normalized_description": "NORMAL D", "destination_name": "Expenses:D"},
             {"type": "withdrawal", "description": "RAW E", "normalized_description": "NORMAL E", "destination_name": "Expenses:E"},
         ]
-    ).to_csv(csv_path, index=False)
+    )
 
     captured = {}
 
@@ -36,7 +35,7 @@ def test_train_prefers_normalized_description_when_available(tmp_path, monkeypat
 
     engine = ml.TransactionCategorizer()
     monkeypatch.setattr(engine, "pipeline", DummyPipeline())
-    assert engine.train_from_csvs([csv_path]) is True
+    assert engine.train_from_dataframes([df]) is True
     assert captured["X"][0] == "NORMAL A"
 
 
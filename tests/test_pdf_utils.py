@@ -11,6 +11,7 @@ This module tests all PDF/OCR functionality including:
 - Metadata extraction
 """
 import re
+from dataclasses import dataclass
 from pathlib import Path
 from unittest.mock import Mock, MagicMock, patch, mock_open
 import pytest
@@ -20,11 +21,13 @@ import numpy as np
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+import pdf_utils
 from pdf_utils import (
     clean_date_str,
     parse_amount_str,
     preprocess_for_ocr,
     ocr_image,
+    ocr_images,
     render_page,
     parse_mx_date,
     extract_transactions_from_pdf,
@@ -38,15 +41,33 @@ from pdf_utils import (
 # Test Fixtures
 # ============================================================================
 
+@dataclass
+class _FakePage:
+    """Minimal stand-in for a PyMuPDF page (only what pdf_utils touches)."""
+    _text: str
+
+    def get_text(self, *_args, **_kwargs):
+        return self._text
+
+
+class _FakeDoc(list):
+    """Minimal stand-in for a PyMuPDF document: a list of pages."""
+
+    @property
+    def page_count(self):
+        return len(self)
+
+    def load_page(self, index):
+        return self[index]
+
+    def close(self):
+        pass
+
+
 @pytest.fixture
 def mock_pdf_doc():
-    """Mock PyMuPDF document object."""
-    doc = MagicMock()
-    doc.page_count = 2
-
-    # Mock page objects
-    page1 = MagicMock()
-    page1.get_text.return_value = """
+    """Fake PyMuPDF document with a two-page text layer."""
+    page1 = _FakePage("""
     BANCO HSBC MEXICO
     Fecha de Corte: 15 ENE 2024
     Limite de Pago: 28 ENE 2024
@@ -55,40 +76,37 @@ def mock_pdf_doc():
     12 ENE OXXO REFORMA 45.50
     13 ENE WALMART INSURGENTES 234.00
     14 ENE AMAZON MEXICO 567.89
-    """
+    """)
 
-    page2 = MagicMock()
-    page2.get_text.return_value = """
+    page2 = _FakePage("""
     15 ENE UBER EATS DELIVERY 123.45
     16 ENE STARBUCKS COFFEE 89.00
-    """
+    """)
 
-    doc.load_page.side_effect = [page1, page2]
-    doc.__getitem__.side_effect = [page1, page2]
-
-    return doc
+    return _FakeDoc([page1, page2])
 
 
 @pytest.fixture
 def mock_empty_pdf_doc():
-    """Mock PDF document with no extractable text (requires OCR)."""
-    doc = MagicMock()
-    doc.page_count = 1
-
-    page = MagicMock()
-    page.get_text.return_value = ""  # Scanned PDF with no text layer
+    """Fake PDF document with no extractable text (requires OCR)."""
+    return _FakeDoc([_FakePage("")])  # Scanned PDF with no text layer
 
-    doc.load_page.return_value = page
-    doc.__getitem__.return_value = page
 
-    return doc
+@pytest.fixture(autouse=True)
+def _clear_page_text_cache():
+    """Keep the module-level page text cache from leaking between tests."""
+    pdf_utils._PAGE_TEXT_CACHE.clear()
+    yield
+    pdf_utils._PAGE_TEXT_CACHE.clear()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_image():
-    """Sample BGR image array for OCR testing."""
-    # Create simple 100x100 BGR image
-    return np.zeros((100, 100, 3), dtype=np.uint8)
+    """Sample BGR image array for OCR testing (shared, read-only)."""
+    # Create simple 100x100 BGR image; write-protected so no test mutates shared state
+    arr = np.zeros((100, 100, 3), dtype=np.uint8)
+    arr.setflags(write=False)
+    return arr
 
 
 # ============================================================================
@@ -182,7 +200,7 @@ class TestPreprocessForOCR:
         mock_cv2.cvtColor.return_value = mock_gray
         mock_cv2.threshold.return_value = (127, mock_gray)
         mock_cv2.resize.return_value = np.zeros((200, 200), dtype=np.uint8)
-        mock_cv2.COLOR_BGR2GRAY = 6
+        mock_cv2.COLOR_RGB2GRAY = 7
         mock_cv2.THRESH_BINARY = 0
         mock_cv2.THRESH_OTSU = 8
         mock_cv2.INTER_CUBIC = 2
@@ -196,6 +214,32 @@ class TestPreprocessForOCR:
 
         assert result is not None
 
+    def test_preprocess_real_opencv_stays_uint8(self):
+        """Real OpenCV pipeline keeps uint8 and leaves the input untouched."""
+        rng = np.random.default_rng(0)
+        img = rng.integers(0, 255, (20, 30, 3), dtype=np.uint8)
+        original = img.copy()
+
+        result = preprocess_for_ocr(img)
+
+        assert result.dtype == np.uint8
+        assert result.shape == (40, 60)
+        assert np.array_equal(img, original)
+
+    def test_preprocess_grayscale_input_skips_color_conversion(self):
+        """Single-channel input is thresholded directly without mutating it."""
+        gray = np.tile(np.arange(0, 250, 10, dtype=np.uint8), (10, 1))
+        gray.setflags(write=False)
+
+        import cv2
+
+        with patch.object(cv2, "cvtColor", wraps=cv2.cvtColor) as cvt:
+            result = preprocess_for_ocr(gray)
+
+        cvt.assert_not_called()
+        assert result.shape == (20, 50)
+        assert result.dtype == np.uint8
+
     @patch('pdf_utils.cv2')
     def test_preprocess_error_handling(self, mock_cv2, sample_image):
         """When preprocessing fails, return original image."""
@@ -231,6 +275,15 @@ class TestOCRImage:
         # Should normalize spaces
         assert result == "Sample text with spaces"
 
+    @patch('pdf_utils.pytesseract')
+    def test_ocr_keeps_line_breaks(self, mock_tess, sample_image):
+        """Space runs collapse but line structure survives for row parsing."""
+        mock_tess.image_to_string.return_value = "12 ENE\t\tOXXO   45.50\n13 ENE  UBER 10.00"
+
+        result = ocr_image(sample_image)
+
+        assert result.splitlines() == ["12 ENE OXXO 45.50", "13 ENE UBER 10.00"]
+
     @patch('pdf_utils.pytesseract')
     def test_ocr_with_spanish(self, mock_tess, sample_image):
         """Test OCR with Spanish language."""
@@ -253,6 +306,77 @@ class TestOCRImage:
         assert result == ""
 
 
+class TestOCRImages:
+    """Tests for batched OCR over several images."""
+
+    @patch('pdf_utils.pytesseract')
+    def test_single_image_uses_plain_ocr(self, mock_tess, sample_image):
+        mock_tess.image_to_string.return_value = "solo   page"
+
+        assert ocr_images([sample_image]) == ["solo page"]
+        assert mock_tess.image_to_string.call_args[0][0] is sample_image
+
+    @patch('pdf_utils._OCR_MAX_WORKERS', 1)
+    @patch('pdf_utils.pytesseract')
+    def test_many_images_run_tesseract_once(self, mock_tess, sample_image):
+        listed = {}
+
+        def fake_ocr(list_path, **_kwargs):
+            listed["paths"] = Path(list_path).read_text(encoding="utf-8").split()
+            return "page  one\fpage two\f"
+
+        mock_tess.image_to_string.side_effect = fake_ocr
+
+        result = ocr_images([sample_image, sample_image], lang="spa")
+
+        assert result == ["page one", "page two"]
+        assert mock_tess.image_to_string.call_count == 1
+        assert len(listed["paths"]) == 2
+        assert all(p.endswith(".png") for p in listed["paths"])
+
+    @patch('pdf_utils._OCR_MAX_WORKERS', 1)
+    @patch('pdf_utils.pytesseract')
+    def test_batch_images_written_under_ocr_tmp_dir(self, mock_tess, sample_image, tmp_path):
+        listed = {}
+
+        def fake_ocr(list_path, **_kwargs):
+            listed["list"] = Path(list_path)
+            return "a\fb\f"
+
+        mock_tess.image_to_string.side_effect = fake_ocr
+        with patch.object(pdf_utils, "_OCR_TMP_DIR", str(tmp_path)):
+            assert ocr_images([sample_image, sample_image]) == ["a", "b"]
+
+        assert listed["list"].parent.parent == tmp_path
+        assert not listed["list"].exists()
+
+    @patch.dict('os.environ')
+    @patch('pdf_utils._OCR_MAX_WORKERS', 2)
+    @patch('pdf_utils.pytesseract')
+    def test_chunks_run_in_parallel_and_keep_order(self, mock_tess, sample_image):
+        def fake_ocr(list_path, **_kwargs):
+            count = len(Path(list_path).read_text(encoding="utf-8").split())
+            return "\f".join(f"chunk of {count}" for _ in range(count)) + "\f"
+
+        mock_tess.image_to_string.side_effect = fake_ocr
+        imgs = [sample_image] * 5
+
+        result = ocr_images(imgs)
+
+        assert mock_tess.image_to_string.call_count == 2
+        assert result == ["chunk of 3"] * 3 + ["chunk of 2"] * 2
+
+    @patch('pdf_utils._OCR_MAX_WORKERS', 1)
+    @patch('pdf_utils.pytesseract')
+    def test_page_count_mismatch_falls_back_per_image(self, mock_tess, sample_image):
+        mock_tess.image_to_string.side_effect = ["only one page", "first", "second"]
+
+        result = ocr_images([sample_image, sample_image])
+
+        assert result == ["first", "second"]
+        assert mock_tess.image_to_string.call_count == 3
+
+
 # ============================================================================
 # Tests for render_page
 # ============================================================================
@@ -282,15 +406,47 @@ class TestRenderPage:
         mock_pix.width = 10
         mock_page.get_pixmap.return_value = mock_pix
 
+        mock_pix.n = 3
+
         # Mock numpy array
         mock_img = np.zeros((10, 10, 3), dtype=np.uint8)
-        mock_np.frombuffer.return_value.reshape.return_value = mock_img
+        mock_np.ndarray.return_value = mock_img
 
         result = render_page(mock_doc, 0, zoom=2.0)
 
         mock_doc.load_page.assert_called_once_with(0)
         mock_page.get_pixmap.assert_called_once()
-        assert result is not None
+        assert result is mock_img
+
+    @patch('pdf_utils.fitz')
+    def test_render_page_wraps_rgb_samples(self, mock_fitz):
+        """Pages are rendered as RGB and the sample bytes are wrapped without a copy."""
+        mock_doc = MagicMock()
+        mock_pix = MagicMock()
+        mock_pix.height, mock_pix.width, mock_pix.n = 2, 3, 3
+        mock_pix.samples = bytes(range(2 * 3 * 3))
+        mock_page = mock_doc.load_page.return_value
+        mock_page.get_pixmap.return_value = mock_pix
+
+        result = render_page(mock_doc, 0)
+
+        _, kwargs = mock_page.get_pixmap.call_args
+        assert kwargs["colorspace"] is mock_fitz.csRGB
+        assert kwargs["alpha"] is False
+        assert result.shape == (2, 3, 3)
+        assert result[0, 1].tolist() == [3, 4, 5]
+        assert not result.flags.owndata
+
+    @patch('pdf_utils.fitz')
+    def test_render_page_rejects_non_rgb_pixmap(self, mock_fitz):
+        """A pixmap that is not 3-channel RGB (e.g. CMYK) is not misread as RGB."""
+        mock_doc = MagicMock()
+        mock_pix = MagicMock()
+        mock_pix.height, mock_pix.width, mock_pix.n = 2, 3, 4
+        mock_pix.samples = bytes(2 * 3 * 4)
+        mock_doc.load_page.return_value.get_pixmap.return_value = mock_pix
+
+        assert render_page(mock_doc, 0) is None
 
     @patch('pdf_utils.fitz')
     def test_render_page_error(self, mock_fitz):
@@ -315,6 +471,15 @@ class TestParseMxDate:
         assert parse_mx_date("12 ENE", year=2024) == "2024-01-12"
         assert parse_mx_date("25 DIC", year=2024) == "2024-12-25"
 
+    def test_repeated_dates_hit_cache_per_year(self):
+        """Identical (date, year) pairs are memoized; a different year is not."""
+        pdf_utils._parse_mx_date_cached.cache_clear()
+        assert parse_mx_date("29 FEB", year=2024) == "2024-02-29"
+        assert parse_mx_date("29 FEB", year=2024) == "2024-02-29"
+        assert parse_mx_date("29 FEB", year=2023) is None
+        info = pdf_utils._parse_mx_date_cached.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+
     def test_parse_day_month_no_space(self):
         """Parse 'DDMMM' format without space."""
         assert parse_mx_date("15FEB", year=2024) == "2024-02-15"
@@ -372,6 +537,14 @@ class TestParseMxDate:
         assert parse_mx_date("15 XYZ", year=2024) is None
         assert parse_mx_date("15/13/2024") is None
 
+    def test_parse_failure_logged_on_every_call(self):
+        """Cached failures are still logged each time, not only on the first miss."""
+        with patch('pdf_utils.logger') as mock_logger:
+            for _ in range(3):
+                assert parse_mx_date("32 ENE", year=2024) is None
+            assert parse_mx_date("15 ENE", year=2024) == "2024-01-15"
+        assert mock_logger.debug.call_count == 3
+
     def test_parse_none_input(self):
         """None input returns None."""
         assert parse_mx_date(None) is None
@@ -454,6 +627,64 @@ class TestExtractTransactionsFromPDF:
         finally:
             temp_path.unlink()
 
+    @patch('pdf_utils.fitz')
+    def test_row_filter_uses_fixed_leap_year(self, mock_fitz, mock_pdf_doc, tmp_path):
+        """Rows are filtered with _ROW_FILTER_YEAR, so the current year is never read."""
+        mock_fitz.open.return_value = mock_pdf_doc
+        pdf_path = tmp_path / "digital.pdf"
+        pdf_path.write_bytes(b"%PDF")
+
+        with patch('pdf_utils.datetime') as mock_dt:
+            mock_dt.now.return_value.year = 2024
+            result = extract_transactions_from_pdf(pdf_path)
+
+        assert len(result) == 5
+        mock_dt.now.assert_not_called()
+
+    @patch('pdf_utils.fitz')
+    def test_feb_29_row_survives_in_non_leap_year(self, mock_fitz, tmp_path):
+        """A 29 FEB row from a leap-year statement is kept in a non-leap current year."""
+        mock_fitz.open.return_value = _FakeDoc([_FakePage("""
+    ESTADO DE CUENTA FEBRERO
+    29 FEB OXXO TIENDA 45.50
+    """)])
+        pdf_path = tmp_path / "leap.pdf"
+        pdf_path.write_bytes(b"%PDF")
+
+        with patch('pdf_utils.datetime') as mock_dt:
+            mock_dt.now.return_value.year = 2026
+            result = extract_transactions_from_pdf(pdf_path)
+
+        assert [t["raw_date"] for t in result] == ["29 FEB"]
+
+    @patch('pdf_utils.fitz')
+    def test_text_layer_does_not_load_ocr_stack(self, mock_fitz, mock_pdf_doc, tmp_path, monkeypatch):
+        """Digital statements never import OpenCV/NumPy/pytesseract."""
+        mock_fitz.open.return_value = mock_pdf_doc
+        for name in ("cv2", "np", "pytesseract"):
+            monkeypatch.setattr(pdf_utils, name, pdf_utils._NOT_LOADED)
+        pdf_path = tmp_path / "digital.pdf"
+        pdf_path.write_bytes(b"%PDF")
+
+        result = extract_transactions_from_pdf(pdf_path)
+
+        assert len(result) == 5
+        assert pdf_utils.cv2 is pdf_utils._NOT_LOADED
+        assert pdf_utils.pytesseract is pdf_utils._NOT_LOADED
+
+    def test_ensure_ocr_deps_keeps_existing_bindings(self, monkeypatch):
+        """Lazy loading fills only unloaded names and leaves test doubles alone."""
+        fake_tess = object()
+        monkeypatch.setattr(pdf_utils, "cv2", pdf_utils._NOT_LOADED)
+        monkeypatch.setattr(pdf_utils, "np", pdf_utils._NOT_LOADED)
+        monkeypatch.setattr(pdf_utils, "pytesseract", fake_tess)
+
+        pdf_utils._ensure_ocr_deps()
+
+        assert pdf_utils.np is np
+        assert pdf_utils.cv2 is not pdf_utils._NOT_LOADED
+        assert pdf_utils.pytesseract is fake_tess
+
     @patch('pdf_utils.pytesseract')
     @patch('pdf_utils.fitz')
     @patch('pdf_utils.cv2')
@@ -484,6 +715,46 @@ class TestExtractTransactionsFromPDF:
                     temp_path.unlink()
 
 
+    @patch('pdf_utils.pytesseract')
+    @patch('pdf_utils.fitz')
+    def test_extract_transactions_batches_ocr_pages(self, mock_fitz, mock_tess, tmp_path):
+        """Pages without a text layer are OCR'd together, in page order."""
+        mock_fitz.open.return_value = _FakeDoc([_FakePage(""), _FakePage("")])
+        pdf_path = tmp_path / "scanned.pdf"
+        pdf_path.write_bytes(b"%PDF")
+        mock_img = np.zeros((10, 10), dtype=np.uint8)
+
+        with patch('pdf_utils.render_page', return_value=mock_img), \
+                patch('pdf_utils.preprocess_for_ocr', return_value=mock_img), \
+                patch('pdf_utils.ocr_images', return_value=["12 ENE OXXO 45.50", "13 ENE UBER 10.00"]) as batch:
+            result = extract_transactions_from_pdf(pdf_path)
+
+        batch.assert_called_once()
+        assert [(t["page"], t["amount"]) for t in result] == [(1, 45.50), (2, 10.00)]
+        mock_tess.image_to_string.assert_not_called()
+
+    @patch('pdf_utils.pytesseract')
+    @patch('pdf_utils.fitz')
+    def test_extract_transactions_caps_pages_held_per_ocr_batch(self, mock_fitz, mock_tess, tmp_path, monkeypatch):
+        """Long scans are rendered and OCR'd window by window, not all at once."""
+        monkeypatch.setattr(pdf_utils, "_OCR_PAGE_BATCH", 2)
+        mock_fitz.open.return_value = _FakeDoc([_FakePage("") for _ in range(5)])
+        pdf_path = tmp_path / "scanned.pdf"
+        pdf_path.write_bytes(b"%PDF")
+        mock_img = np.zeros((10, 10), dtype=np.uint8)
+
+        def fake_batch(imgs, lang):
+            return [f"1{len(imgs)} ENE OXXO 1.00"] * len(imgs)
+
+        with patch('pdf_utils.render_page', return_value=mock_img), \
+                patch('pdf_utils.preprocess_for_ocr', return_value=mock_img), \
+                patch('pdf_utils.ocr_images', side_effect=fake_batch) as batch:
+            result = extract_transactions_from_pdf(pdf_path)
+
+        assert [len(c.args[0]) for c in batch.call_args_list] == [2, 2, 1]
+        assert [t["page"] for t in result] == [1, 2, 3, 4, 5]
+
+
 # ============================================================================
 # Tests for collect_pdf_lines
 # ============================================================================
@@ -523,6 +794,44 @@ class TestCollectPDFLines:
         assert result == []
 
 
+# ============================================================================
+# Tests for the shared page text cache
+# ============================================================================
+
+class TestPageTextCache:
+    """Tests for page text reuse across extraction functions."""
+
+    @patch('pdf_utils.fitz')
+    def test_page_text_extracted_once_across_functions(self, mock_fitz, tmp_path):
+        """Metadata, transactions and lines share one text extraction per page."""
+        page = MagicMock()
+        page.get_text.return_value = "Total a Pagar: $1,234.56\n12 ENE OXXO REFORMA 45.50\n" + "x" * 60
+        mock_fitz.open.side_effect = lambda *_a, **_kw: _FakeDoc([page])
+        pdf_path = tmp_path / "statement.pdf"
+        pdf_path.write_bytes(b"%PDF")
+
+        extract_pdf_metadata(pdf_path)
+        extract_transactions_from_pdf(pdf_path)
+        collect_pdf_lines(pdf_path)
+
+        assert page.get_text.call_count == 1
+
+    @patch('pdf_utils.fitz')
+    def test_modified_file_is_reextracted(self, mock_fitz, tmp_path):
+        """A changed file (new mtime/size) does not reuse stale text."""
+        page = MagicMock()
+        page.get_text.return_value = "12 ENE OXXO 45.50"
+        mock_fitz.open.side_effect = lambda *_a, **_kw: _FakeDoc([page])
+        pdf_path = tmp_path / "statement.pdf"
+        pdf_path.write_bytes(b"%PDF")
+
+        collect_pdf_lines(pdf_path)
+        pdf_path.write_bytes(b"%PDF-changed")
+        collect_pdf_lines(pdf_path)
+
+        assert page.get_text.call_count == 2
+
+
 # ============================================================================
 # Tests for extract_pdf_metadata
 # ============================================================================
@@ -574,6 +883,44 @@ class TestExtractPDFMetadata:
         finally:
             temp_path.unlink()
 
+    @pytest.mark.parametrize("reported, expected", [(True, 1234.56), (False, None)])
+    @patch('pdf_utils.fitz')
+    def test_extract_metadata_uses_prefilter_hits(self, mock_fitz, mock_pdf_doc, tmp_path, reported, expected):
+        """Only patterns reported by the multi-pattern prefilter are searched."""
+        mock_fitz.open.return_value = mock_pdf_doc
+        ids = [key for key, regexes in pdf_utils.PATTERNS.items() for _ in regexes]
+        total_id = ids.index("total_pagar")
+
+        class _FakeDB:
+            def scan(self, data, match_event_handler):
+                if reported:
+                    match_event_handler(total_id, 0, len(data), 0, None)
+
+        pdf_path = tmp_path / "statement.pdf"
+        pdf_path.write_bytes(b"%PDF")
+        with patch.object(pdf_utils, "_PATTERNS_DB", _FakeDB()):
+            result = extract_pdf_metadata(pdf_path)
+
+        assert result.get("total_pagar") == expected
+
+    @pytest.mark.parametrize("text", [
+        "Fecha de Corte: 15 ENE 2024\nLímite de Pago: 28/ENE/2024\nPago Mínimo: $1,234.56",
+        "FECHA DE CORTE: 15/ENE/2024 LÍMITE DE PAGO: 28/FEB/2024 PAGO MÍNIMO $ 100.00",
+        "Periodo: 01 ENE 2024 - 31 ENE 2024\nTotal a Pagar: $9,999.99\nSaldo total 1,000.00",
+        "Pago para no generar intereses: $2,000.00\npago minimo: 5.00",
+        "corte: 15/Ñam/24 límite  de pago 03/mar/2024 periodo 1 ENÉ 24 - 2 FEB 24",
+        "Estado de cuenta sin datos de pago",
+    ])
+    def test_hyperscan_prefilter_agrees_with_re(self, text):
+        """The real Hyperscan database reports every pattern that re.search finds."""
+        pytest.importorskip("hyperscan")
+        assert pdf_utils._PATTERNS_DB is not None
+
+        flat = [rx for regexes in pdf_utils.PATTERNS.values() for rx in regexes]
+        expected = {i for i, rx in enumerate(flat) if rx.search(text)}
+
+        assert pdf_utils._prefilter_hits(pdf_utils._PATTERNS_DB, text) == expected
+
     def test_extract_metadata_file_not_found(self):
         """When PDF doesn't exist, return empty dict."""
         result = extract_pdf_metadata(Path("/nonexistent.pdf"))
@@ -639,6 +986,13 @@ class TestEdgeCases:
         """Test February 29 on leap year."""
         assert parse_mx_date("29/02/2024") == "2024-02-29"
 
+    def test_parse_mx_date_rejects_days_past_month_end(self):
+        """Days that do not exist in the month are rejected."""
+        assert parse_mx_date("29/02/2023") is None
+        assert parse_mx_date("31/04/2024") is None
+        assert parse_mx_date("30 FEB", year=2024) is None
+        assert parse_mx_date("2024-02-30") is None
+
     def test_parse_amount_very_large(self):
         """Test very large amounts."""
         assert parse_amount_str("999,999,999.99") == 999999999.99
@@ -765,6 +1119,7 @@ class TestCollectPDFLinesOCR:
         mock_page = MagicMock()
         mock_page.get_text.return_value = ""  # No text layer
         mock_doc.load_page.return_value = mock_page
+        mock_doc.__getitem__.return_value = mock_page
         mock_doc.close = MagicMock()
         mock_fitz.open.return_value = mock_doc
 
@@ -6,7 +6,7 @@ import pytest
 from services import rule_service as rs
 
 
-def _seed_rules(path: Path) -> None:
+def _seed_rules(path: Path, dump_yaml) -> None:
     data = {
         "rules": [
             {
@@ -16,18 +16,18 @@ def _seed_rules(path: Path) -> None:
             }
         ]
     }
-    path.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+    path.write_text(dump_yaml(data), encoding="utf-8")
 
 
 # ===========================
 # Integration Tests (Existing)
 # ===========================
 
-def test_stage_and_merge_rule_creates_backup(tmp_path: Path):
+def test_stage_and_merge_rule_creates_backup(tmp_path: Path, dump_yaml):
     rules_path = tmp_path / "rules.yml"
     pending_path = tmp_path / "rules.pending.yml"
     backup_dir = tmp_path / "backups"
-    _seed_rules(rules_path)
+    _seed_rules(rules_path, dump_yaml)
 
     ok_stage, stage = rs.stage_rule_change(
         rules_path=rules_path,
@@ -49,10 +49,31 @@ def test_stage_and_merge_rule_creates_backup(tmp_path: Path):
     assert pending_path.exists() is False
 
 
-def test_stage_detects_conflict_on_existing_regex(tmp_path: Path):
+def test_merge_backup_is_byte_identical_copy(tmp_path: Path, dump_yaml):
     rules_path = tmp_path / "rules.yml"
     pending_path = tmp_path / "rules.pending.yml"
-    _seed_rules(rules_path)
+    _seed_rules(rules_path, dump_yaml)
+    original = rules_path.read_bytes()
+    rs.stage_rule_change(
+        rules_path=rules_path,
+        pending_path=pending_path,
+        merchant_name="spotify",
+        regex_pattern="spotify",
+        expense_account="Expenses:Entertainment:Subscriptions",
+        bucket_tag="subscriptions",
+    )
+
+    ok, merge = rs.merge_pending_rules(rules_path, pending_path, tmp_path / "backups")
+
+    assert ok is True
+    assert Path(merge["backup_path"]).read_bytes() == original
+    assert rules_path.read_bytes() != original
+
+
+def test_stage_detects_conflict_on_existing_regex(tmp_path: Path, dump_yaml):
+    rules_path = tmp_path / "rules.yml"
+    pending_path = tmp_path / "rules.pending.yml"
+    _seed_rules(rules_path, dump_yaml)
     ok, result = rs.stage_rule_change(
         rules_path=rules_path,
         pending_path=pending_path,
@@ -72,11 +93,11 @@ def test_stage_detects_conflict_on_existing_regex(tmp_path: Path):
 class TestLoadYaml:
     """Test _load_yaml helper function."""
 
-    def test_loads_valid_yaml_file(self, tmp_path):
+    def test_loads_valid_yaml_file(self, tmp_path, dump_yaml):
         """Test loading valid YAML file."""
         yaml_path = tmp_path / "test.yml"
         data = {"key": "value", "number": 42}
-        yaml_path.write_text(yaml.safe_dump(data), encoding="utf-8")
+        yaml_path.write_text(dump_yaml(data), encoding="utf-8")
 
         loaded = rs._load_yaml(yaml_path)
         assert loaded["key"] == "value"
@@ -96,17 +117,50 @@ class TestLoadYaml:
         loaded = rs._load_yaml(yaml_path)
         assert loaded == {}
 
-    def test_handles_yaml_with_unicode(self, tmp_path):
+    def test_handles_yaml_with_unicode(self, tmp_path, dump_yaml):
         """Test loading YAML with Unicode characters."""
         yaml_path = tmp_path / "unicode.yml"
         data = {"spanish": "Niño", "emoji": "🎉"}
-        yaml_path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+        yaml_path.write_text(dump_yaml(data), encoding="utf-8")
 
         loaded = rs._load_yaml(yaml_path)
         assert loaded["spanish"] == "Niño"
         assert loaded["emoji"] == "🎉"
 
 
+    def test_cached_load_returns_independent_copies(self, tmp_path, dump_yaml):
+        """Repeat loads of an unchanged file are cached but safe to mutate."""
+        yaml_path = tmp_path / "rules.yml"
+        yaml_path.write_text(dump_yaml({"rules": [{"name": "A"}]}), encoding="utf-8")
+
+        first = rs._load_yaml(yaml_path)
+        first["rules"].append({"name": "B"})
+        second = rs._load_yaml(yaml_path)
+
+        assert second == {"rules": [{"name": "A"}]}
+
+    def test_read_only_load_shares_cached_instance(self, tmp_path, dump_yaml):
+        """mutate=False skips the copy; mutable loads stay independent."""
+        yaml_path = tmp_path / "rules.yml"
+        yaml_path.write_text(dump_yaml({"rules": [{"name": "A"}]}), encoding="utf-8")
+
+        shared = rs._load_yaml(yaml_path, mutate=False)
+        copy = rs._load_yaml(yaml_path)
+
+        assert rs._load_yaml(yaml_path, mutate=False) is shared
+        assert copy == shared and copy is not shared
+
+    def test_cache_invalidated_by_atomic_write(self, tmp_path):
+        """Writes through the module replace the cached content."""
+        yaml_path = tmp_path / "rules.yml"
+        rs._write_yaml_atomic(yaml_path, {"v": 1})
+        assert rs._load_yaml(yaml_path) == {"v": 1}
+
+        rs._write_yaml_atomic(yaml_path, {"v": 2})
+
+        assert rs._load_yaml(yaml_path) == {"v": 2}
+
+
 class TestWriteYamlAtomic:
     """Test _write_yaml_atomic helper function."""
 
@@ -131,10 +185,10 @@ class TestWriteYamlAtomic:
         assert yaml_path.exists()
         assert yaml_path.parent.exists()
 
-    def test_overwrites_existing_file(self, tmp_path):
+    def test_overwrites_existing_file(self, tmp_path, dump_yaml):
         """Test that existing file is overwritten."""
         yaml_path = tmp_path / "overwrite.yml"
-        yaml_path.write_text(yaml.safe_dump({"old": "data"}), encoding="utf-8")
+        yaml_path.write_text(dump_yaml({"old": "data"}), encoding="utf-8")
 
         rs._write_yaml_atomic(yaml_path, {"new": "data"})
 
@@ -163,6 +217,55 @@ class TestWriteYamlAtomic:
         assert not temp_path.exists()
 
 
+    def test_fsyncs_before_replacing(self, tmp_path, monkeypatch):
+        """Content is flushed to disk before the rename exposes it."""
+        yaml_path = tmp_path / "durable.yml"
+        synced = []
+        real_fsync = rs.os.fsync
+
+        def spy_fsync(fd):
+            synced.append(yaml_path.exists())
+            real_fsync(fd)
+
+        monkeypatch.setattr(rs.os, "fsync", spy_fsync)
+        rs._write_yaml_atomic(yaml_path, {"a": 1})
+
+        assert synced == [False]
+        assert yaml.safe_load(yaml_path.read_text(encoding="utf-8")) == {"a": 1}
+
+
+class TestDumpPending:
+    """Test the fast pending-rules serializer."""
+
+    @pytest.mark.parametrize("merchant, regex", [
+        ("spotify", "spotify"),
+        ("Niño's: café", r"ni[ñn]o\s+\d+ \"quoted\" #x"),
+        ("- dash", "*star & [x]: {y}"),
+    ])
+    def test_template_round_trips(self, merchant, regex):
+        """Template output loads back to the same payload."""
+        payload = {
+            "updated_at_utc": "2026-01-01T00:00:00+00:00",
+            "pending_rules": [
+                rs.build_rule(merchant, regex, "Expenses:Other", "misc"),
+                rs.build_rule("uber", "uber", "Expenses:Transport", "transport"),
+            ],
+        }
+        text = rs._dump_pending(payload)
+        assert text.startswith('updated_at_utc: "2026')
+        assert yaml.safe_load(text) == payload
+
+    @pytest.mark.parametrize("rule", [
+        {"name": "Hand", "any_regex": ["a"], "set": {"expense": "E", "tags": ["t"]}, "priority": 5},
+        {"name": "Tabs", "any_regex": ["a\tb"], "set": {"expense": "E", "tags": ["t"]}},
+        {"name": "NoTags", "any_regex": ["a"], "set": {"expense": "E", "tags": []}},
+    ])
+    def test_falls_back_to_yaml_dump(self, rule):
+        """Rules outside the fixed schema still serialize losslessly."""
+        payload = {"updated_at_utc": "2026-01-01T00:00:00+00:00", "pending_rules": [rule]}
+        assert yaml.safe_load(rs._dump_pending(payload)) == payload
+
+
 class TestBuildRule:
     """Test build_rule function."""
 
@@ -299,10 +402,24 @@ class TestDetectConflicts:
         assert len(regex_conflicts) == 1
 
 
+class TestRuleStore:
+    """Test the incremental RuleStore index."""
+
+    def test_added_rules_become_conflicts(self):
+        """Rules added after construction are seen by later checks."""
+        store = rs.RuleStore.from_rules([{"name": "A", "any_regex": ["a"]}])
+        candidate = {"name": "B", "any_regex": [" b "]}
+        assert store.conflicts(candidate) == []
+
+        store.add(candidate)
+
+        assert store.conflicts({"name": "B", "any_regex": ["a", "b"]}) == ["name:B", "regex:a", "regex:b"]
+
+
 class TestGetPendingCount:
     """Test get_pending_count function."""
 
-    def test_returns_count_of_pending_rules(self, tmp_path):
+    def test_returns_count_of_pending_rules(self, tmp_path, dump_yaml):
         """Test that correct count is returned for pending rules."""
         pending_path = tmp_path / "pending.yml"
         data = {
@@ -312,7 +429,7 @@ class TestGetPendingCount:
                 {"name": "Rule3", "any_regex": ["p3"]}
             ]
         }
-        pending_path.write_text(yaml.safe_dump(data), encoding="utf-8")
+        pending_path.write_text(dump_yaml(data), encoding="utf-8")
 
         count = rs.get_pending_count(pending_path)
         assert count == 3
@@ -323,25 +440,39 @@ class TestGetPendingCount:
         count = rs.get_pending_count(pending_path)
         assert count == 0
 
-    def test_returns_zero_when_no_pending_rules(self, tmp_path):
+    def test_returns_zero_when_no_pending_rules(self, tmp_path, dump_yaml):
         """Test that 0 is returned when pending_rules list is empty."""
         pending_path = tmp_path / "empty.yml"
         data = {"pending_rules": []}
-        pending_path.write_text(yaml.safe_dump(data), encoding="utf-8")
+        pending_path.write_text(dump_yaml(data), encoding="utf-8")
 
         count = rs.get_pending_count(pending_path)
         assert count == 0
 
-    def test_handles_missing_pending_rules_key(self, tmp_path):
+    def test_handles_missing_pending_rules_key(self, tmp_path, dump_yaml):
         """Test handling when pending_rules key is missing."""
         pending_path = tmp_path / "no_key.yml"
         data = {"other_key": "value"}
-        pending_path.write_text(yaml.safe_dump(data), encoding="utf-8")
+        pending_path.write_text(dump_yaml(data), encoding="utf-8")
 
         count = rs.get_pending_count(pending_path)
         assert count == 0
 
 
+    @pytest.mark.parametrize("text, expected", [
+        ("", 0),
+        ("updated_at_utc: x\n", 0),
+        ("base: &b\n  pending_rules: [a, b]\nother:\n  <<: *b\n", 0),
+        ("<<: {pending_rules: [a, b]}\n", 2),
+    ])
+    def test_counts_without_constructing_unusual_shapes(self, tmp_path, text, expected):
+        """Empty files, missing keys and merge keys match the full-load count."""
+        pending_path = tmp_path / "pending.yml"
+        pending_path.write_text(text, encoding="utf-8")
+
+        assert rs.get_pending_count(pending_path) == expected
+
+
 def test_sync_rules_to_db_populates_table(tmp_path):
     from pathlib import Path
     from services.db_service import DatabaseService
@@ -413,27 +544,39 @@ rules:
 class TestMergePendingRulesEdgeCases:
     """Test edge cases for merge_pending_rules function."""
 
-    def test_returns_no_pending_when_file_missing(self, tmp_path):
+    def test_returns_no_pending_when_file_missing(self, tmp_path, dump_yaml):
         """Test handling when pending file doesn't exist."""
         rules_path = tmp_path / "rules.yml"
         pending_path = tmp_path / "pending.yml"
         backup_dir = tmp_path / "backups"
 
-        _seed_rules(rules_path)
+        _seed_rules(rules_path, dump_yaml)
 
         ok, result = rs.merge_pending_rules(rules_path, pending_path, backup_dir)
 
         assert ok is False
         assert result["status"] == "no_pending"
 
-    def test_detects_conflicts_during_merge(self, tmp_path):
+    def test_empty_pending_skips_rules_file(self, tmp_path, dump_yaml):
+        """An empty pending queue short-circuits before rules.yml is parsed."""
+        rules_path = tmp_path / "rules.yml"
+        pending_path = tmp_path / "pending.yml"
+        rules_path.write_text("rules: [unterminated", encoding="utf-8")
+        pending_path.write_text(dump_yaml({"pending_rules": []}), encoding="utf-8")
+
+        ok, result = rs.merge_pending_rules(rules_path, pending_path, tmp_path / "backups")
+
+        assert ok is False
+        assert result["status"] == "no_pending"
+
+    def test_detects_conflicts_during_merge(self, tmp_path, dump_yaml):
         """Test conflict detection during merge operation."""
         rules_path = tmp_path / "rules.yml"
         pending_path = tmp_path / "pending.yml"
         backup_dir = tmp_path / "backups"
 
         # Seed with existing rule
-        _seed_rules(rules_path)
+        _seed_rules(rules_path, dump_yaml)
 
         # Create pending with conflicting rule
         pending_data = {
@@ -445,10 +588,29 @@ class TestMergePendingRulesEdgeCases:
                 }
             ]
         }
-        pending_path.write_text(yaml.safe_dump(pending_data), encoding="utf-8")
+        pending_path.write_text(dump_yaml(pending_data), encoding="utf-8")
 
         ok, result = rs.merge_pending_rules(rules_path, pending_path, backup_dir)
 
         assert ok is False
         assert result["status"] == "conflict"
         assert len(result["conflicts"]) > 0
+
+    def test_detects_conflicts_between_pending_rules(self, tmp_path, dump_yaml):
+        """A pending rule conflicting with an earlier pending rule is reported."""
+        rules_path = tmp_path / "rules.yml"
+        pending_path = tmp_path / "pending.yml"
+        _seed_rules(rules_path, dump_yaml)
+        pending_data = {
+            "pending_rules": [
+                rs.build_rule("uber", "uber", "Expenses:Transport", "transport"),
+                rs.build_rule("uber_eats", "uber", "Expenses:Food", "food"),
+            ]
+        }
+        pending_path.write_text(dump_yaml(pending_data), encoding="utf-8")
+
+        ok, result = rs.merge_pending_rules(rules_path, pending_path, tmp_path / "backups")
+
+        assert ok is False
+        assert result["conflicts"] == [{"rule": "UserCorrection:uber_eats", "conflicts": ["regex:uber"]}]
+        assert result["mergeable_count"] == 1
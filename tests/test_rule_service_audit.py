@@ -1,24 +1,22 @@
 from pathlib import Path
 
-import yaml
-
 from services import rule_service as rs
 from services.db_service import DatabaseService
 
 
-def _seed_rules(path: Path) -> None:
+def _seed_rules(path: Path, dump_yaml) -> None:
     path.write_text(
-        yaml.safe_dump({"rules": []}, sort_keys=False),
+        dump_yaml({"rules": []}),
         encoding="utf-8",
     )
 
 
-def test_stage_and_merge_write_audit_events(tmp_path):
+def test_stage_and_merge_write_audit_events(tmp_path, dump_yaml):
     rules_path = tmp_path / "rules.yml"
     pending_path = tmp_path / "rules.pending.yml"
     backup_dir = tmp_path / "backups"
     db_path = tmp_path / "ledger.db"
-    _seed_rules(rules_path)
+    _seed_rules(rules_path, dump_yaml)
 
     db = DatabaseService(db_path=db_path)
     db.initialize()
@@ -46,6 +44,7 @@ def test_stage_and_merge_write_audit_events(tmp_path):
     event_types = [e["event_type"] for e in events]
     assert "rule_staged" in event_types
     assert "rules_merged" in event_types
+    assert event_types == ["rule_staged", "rules_merged"]
 
 
 def test_record_recategorization_event(tmp_path):
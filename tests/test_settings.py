@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from settings import load_settings
@@ -49,3 +50,16 @@ def test_load_settings_reads_dotenv(monkeypatch, tmp_path):
 
     s = load_settings()
     assert s.log_level == "WARNING"
+
+
+def test_load_settings_limits_openmp_threads(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    # setenv first so monkeypatch restores the original state afterwards.
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "x")
+    monkeypatch.delenv("OMP_THREAD_LIMIT")
+    load_settings()
+    assert os.environ["OMP_THREAD_LIMIT"] == "1"
+
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "4")
+    load_settings()
+    assert os.environ["OMP_THREAD_LIMIT"] == "4"
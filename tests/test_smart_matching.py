@@ -1,7 +1,11 @@
 """Tests for smart_matching.py - fuzzy merchant matching utilities."""
 
+import pandas as pd
 import pytest
-from smart_matching import find_similar_merchants, normalize_for_matching
+from rapidfuzz import fuzz
+
+import smart_matching as sm
+from smart_matching import find_similar_merchants, find_similar_merchants_batch, normalize_for_matching
 
 
 class TestFindSimilarMerchants:
@@ -139,6 +143,75 @@ class TestFindSimilarMerchants:
         # Should find close matches
         assert len(results) > 0
 
+    def test_scores_match_token_sort_ratio(self):
+        """Pre-sorted choices score exactly like token_sort_ratio."""
+        target = "SUPERCENTER WALMART 24"
+        existing = ["WALMART SUPERCENTER", "WAL MART  EXPRESS", "OXXO REFORMA", float("nan"), "SUPER WALMART"]
+
+        results = find_similar_merchants(target, existing, threshold=0)
+
+        assert {m: s for m, s in results} == {
+            m: fuzz.token_sort_ratio(target, m) for m in existing if isinstance(m, str)
+        }
+
+    @pytest.mark.parametrize("target, merchant", [
+        ("OXXO\xa0REFORMA", "REFORMA OXXO"),
+        ("REFORMA OXXO", "OXXO\x85REFORMA"),
+        ("OXXO\xa0REFORMA　CAFÉ", "CAFÉ REFORMA OXXO"),
+    ])
+    def test_nbsp_tokenized_like_token_sort_ratio(self, target, merchant):
+        """NBSP/NEL split tokens only where rapidfuzz splits them too."""
+        results = find_similar_merchants(target, [merchant], threshold=0)
+        assert results == [(merchant, fuzz.token_sort_ratio(target, merchant))]
+
+    def test_skips_missing_choices(self):
+        """None, NaN and pd.NA choices are skipped like process.extract does."""
+        existing = ["OXXO", float("nan"), None, pd.NA]
+        assert find_similar_merchants("OXXO", existing) == [("OXXO", 100.0)]
+
+    def test_reuses_prepared_choices_for_same_list(self):
+        """Repeated searches over one merchant list prepare it only once."""
+        sm._prep_choices.cache_clear()
+        existing = ["STARBUCKS", "WALMART", "TARGET"]
+
+        find_similar_merchants("STARBUCKS", existing)
+        find_similar_merchants("WALMART", existing)
+
+        info = sm._prep_choices.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+
+
+class TestFindSimilarMerchantsBatch:
+    """Test find_similar_merchants_batch matrix scoring."""
+
+    def test_matches_single_query_results(self):
+        """Each row equals the per-query search, including order and ties."""
+        existing = [
+            "WALMART SUPERCENTER", "SUPERCENTER WALMART", "WALMART", "WAL MART",
+            "STARBUCKS", "STARBUCKS COFFEE", "OXXO", None, float("nan"), "TARGET", "WALMART EXPRESS",
+        ]
+        queries = ["WALMART", "STARBUCKS CORP", "OXXO REFORMA", "ZZZ"]
+
+        for threshold in (0, 50, 70):
+            assert find_similar_merchants_batch(queries, existing, threshold=threshold) == [
+                find_similar_merchants(q, existing, threshold=threshold) for q in queries
+            ]
+
+    def test_empty_queries_get_empty_rows(self):
+        """Empty or None queries yield an empty list in their slot."""
+        results = find_similar_merchants_batch(["", None, "OXXO"], ["OXXO"], threshold=0)
+        assert results == [[], [], [("OXXO", 100.0)]]
+
+    def test_missing_queries_get_empty_rows(self):
+        """NaN and pd.NA queries (e.g. a pandas description column) yield empty rows."""
+        results = find_similar_merchants_batch([float("nan"), pd.NA, "OXXO"], ["OXXO"], threshold=0)
+        assert results == [[], [], [("OXXO", 100.0)]]
+
+    def test_handles_empty_inputs(self):
+        """No queries gives no rows; no merchants gives empty rows."""
+        assert find_similar_merchants_batch([], ["OXXO"]) == []
+        assert find_similar_merchants_batch(["OXXO", "WALMART"], []) == [[], []]
+
 
 class TestNormalizeForMatching:
     """Test normalize_for_matching text normalization function."""
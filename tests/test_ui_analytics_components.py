@@ -82,9 +82,9 @@ def category_translation_func():
     return tc
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def basic_stats():
-    """Basic statistics dictionary."""
+    """Basic statistics dictionary (shared read-only; renderers never mutate stats)."""
     return {
         "total": 100,
         "total_spent": 5000.50,
@@ -188,18 +188,13 @@ class TestRenderMetrics:
 class TestRenderCharts:
     """Tests for chart rendering."""
 
-    def test_render_charts_creates_pie_chart(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
-        """Create pie chart for coverage."""
+    def test_render_charts_with_full_stats(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
+        """Full stats render coverage pie, type bar and spending share pie."""
         render_charts(translation_func, basic_stats, category_translation_func)
 
         mock_ui_service.get_coverage_pie_fig.assert_called_once()
-        assert mock_streamlit.plotly_chart.call_count >= 1
-
-    def test_render_charts_creates_bar_chart_when_type_counts(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
-        """Create bar chart when type counts exist."""
-        render_charts(translation_func, basic_stats, category_translation_func)
-
         mock_ui_service.get_type_bar_fig.assert_called_once()
+        mock_ui_service.get_spending_share_fig.assert_called_once()
         # Coverage + Type + Spending Share = 3 charts
         assert mock_streamlit.plotly_chart.call_count == 3
 
@@ -223,12 +218,6 @@ class TestRenderCharts:
         # Only coverage pie chart is plotted with plotly_chart
         assert mock_streamlit.plotly_chart.call_count == 1
 
-    def test_render_charts_spending_share_pie(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
-        """Create spending share pie chart."""
-        render_charts(translation_func, basic_stats, category_translation_func)
-
-        mock_ui_service.get_spending_share_fig.assert_called_once()
-
     def test_render_charts_no_spending_share_when_empty(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func):
         """Don't create spending share chart when category_spending is empty."""
         stats = {
@@ -263,26 +252,15 @@ class TestRenderCategoryDeepDive:
         mock_ui_service.get_category_count_fig.assert_called_once()
         mock_ui_service.get_category_spending_fig.assert_called_once()
 
-        # Verify dataframe displayed
+        # Verify dataframe displayed with the category columns
         mock_streamlit.dataframe.assert_called_once()
-
-    def test_render_category_deep_dive_creates_dataframe(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
-        """Create DataFrame with category data."""
-        render_category_deep_dive(translation_func, category_translation_func, basic_stats)
-
-        # Check dataframe call
         df_call = mock_streamlit.dataframe.call_args[0][0]
         assert isinstance(df_call, pd.DataFrame)
         assert "Category" in df_call.columns
         assert "Transactions" in df_call.columns
         assert "Total Spent" in df_call.columns
 
-    def test_render_category_deep_dive_translates_categories(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func, basic_stats):
-        """Apply category translation to labels."""
-        render_category_deep_dive(translation_func, category_translation_func, basic_stats)
-
         # Check that category translation was used
-        df_call = mock_streamlit.dataframe.call_args[0][0]
         assert all("cat_" in cat for cat in df_call["Category"])
 
     def test_render_category_deep_dive_no_render_when_empty(self, mock_streamlit, mock_ui_service, translation_func, category_translation_func):
@@ -73,9 +73,12 @@ def test_flet_import_view_builds_with_current_flet_api() -> None:
     assert view is not None
 
 
-def test_flet_manual_entry_view_builds_with_current_flet_api() -> None:
+def test_flet_manual_entry_view_builds_with_current_flet_api(monkeypatch, tmp_path) -> None:
     from ui.flet_ui.manual_entry_view import get_manual_entry_view
 
+    # Building the view opens the ledger database; keep it out of the repo's data/.
+    monkeypatch.setenv("LSC_DATA_DIR", str(tmp_path))
+
     view = get_manual_entry_view(
         page=_DummyPage(),
         t=lambda key, **kwargs: key,
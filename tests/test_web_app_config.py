@@ -1,36 +1,82 @@
 """Tests for web_app.py configuration and mobile UX."""
 
 import ast
+import functools
 import re
 import sys
 from pathlib import Path
 
 WEB_APP = Path(__file__).parent.parent / "src" / "web_app.py"
 
+# Source tokens the tests assert on, matched together in one scan.
+_TOKENS = re.compile(
+    r'(?P<sidebar_language>st\.sidebar\.selectbox\(\s*cast\(str, t\("language_select"\)\))'
+    r'|(?P<sidebar_bank>st\.sidebar\.selectbox\(\s*cast\(str, t\("select_bank"\)\))'
+    r"|(?P<navigation>st\.navigation)"
+    r"|(?P<page>st\.Page)"
+)
 
-def _get_page_config_kwargs():
-    """Parse web_app.py and extract st.set_page_config keyword arguments (literals only)."""
-    tree = ast.parse(WEB_APP.read_text(encoding="utf-8"))
-    for node in ast.walk(tree):
+
+@functools.lru_cache(maxsize=1)
+def _get_source():
+    """Read web_app.py once per session; the file does not change under pytest."""
+    return WEB_APP.read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _token_presence():
+    """Map each ``_TOKENS`` group name to whether it occurs in web_app.py."""
+    found = {m.lastgroup for m in _TOKENS.finditer(_get_source())}
+    return {name: name in found for name in _TOKENS.groupindex}
+
+
+@functools.lru_cache(maxsize=1)
+def _get_tree():
+    """Parse web_app.py once and share the module AST across tests."""
+    return ast.parse(_get_source())
+
+
+class _WebAppFacts(ast.NodeVisitor):
+    """Collect everything the tests need from web_app.py in one traversal."""
+
+    def __init__(self):
+        self.page_config_kwargs = None
+        self.function_names = set()
+
+    def visit_Call(self, node):
         if (
-            isinstance(node, ast.Call)
+            self.page_config_kwargs is None
             and isinstance(node.func, ast.Attribute)
             and node.func.attr == "set_page_config"
         ):
-            result = {}
+            self.page_config_kwargs = {}
             for kw in node.keywords:
                 try:
-                    result[kw.arg] = ast.literal_eval(kw.value)
+                    self.page_config_kwargs[kw.arg] = ast.literal_eval(kw.value)
                 except (ValueError, TypeError):
                     pass  # skip non-literal args like t("page_title")
-            return result
-    return {}
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.function_names.add(node.name)
+        self.generic_visit(node)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_facts():
+    facts = _WebAppFacts()
+    facts.visit(_get_tree())
+    return facts
+
+
+def _get_page_config_kwargs():
+    """Return st.set_page_config keyword arguments from web_app.py (literals only)."""
+    return _get_facts().page_config_kwargs or {}
 
 
 def _get_function_names():
-    """Return set of all top-level function names defined in web_app.py."""
-    tree = ast.parse(WEB_APP.read_text(encoding="utf-8"))
-    return {node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)}
+    """Return set of all function names defined in web_app.py."""
+    return _get_facts().function_names
 
 
 def test_sidebar_auto_state():
@@ -44,15 +90,11 @@ def test_sidebar_auto_state():
 
 def test_sidebar_does_not_contain_global_controls():
     """Global controls should live in the header bar, not in the sidebar."""
-    source = WEB_APP.read_text(encoding="utf-8")
-    assert not re.search(
-        r'st\.sidebar\.selectbox\(\s*cast\(str, t\("language_select"\)\)', source
-    ), (
+    presence = _token_presence()
+    assert not presence["sidebar_language"], (
         "The language selector must not live in the sidebar; it belongs in the header controls bar."
     )
-    assert not re.search(
-        r'st\.sidebar\.selectbox\(\s*cast\(str, t\("select_bank"\)\)', source
-    ), (
+    assert not presence["sidebar_bank"], (
         "The bank selector must not live in the sidebar; it belongs in the header controls bar."
     )
 
@@ -65,9 +107,9 @@ def test_page_config_layout_wide():
 
 def test_navigation_is_native():
     """Application must use native st.navigation."""
-    source = WEB_APP.read_text(encoding="utf-8")
-    assert "st.navigation" in source, "web_app.py must use st.navigation for routing"
-    assert "st.Page" in source, "web_app.py must use st.Page objects"
+    presence = _token_presence()
+    assert presence["navigation"], "web_app.py must use st.navigation for routing"
+    assert presence["page"], "web_app.py must use st.Page objects"
 
 
 def test_page_functions_defined():